@@ -3,31 +3,49 @@ SWLC MCP Server HTTP API
 为MCP服务器提供HTTP接口，支持其他应用通过HTTP请求访问彩票数据
 """
 
+import asyncio
+import functools
+import heapq
 import logging
+import sys
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple, Callable
+import anyio.to_thread
 from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, ORJSONResponse, Response, StreamingResponse
 from fastapi.staticfiles import StaticFiles
+from pydantic import BaseModel
+import orjson
 import uvicorn
 
-from .server import SWLCService
-
-# 导入新模块
-from .predictor import PredictionManager
-from .backtest import BacktestEngine
+from .server import SWLCService, LotteryResult
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 同步接口所用线程池的容量（anyio 默认为40）
+THREADPOOL_SIZE = 100
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：启动时调整线程池容量，关闭时释放HTTP连接池"""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
+    yield
+    await lottery_service.aclose()
+
 # 创建FastAPI应用
 app = FastAPI(
     title="SWLC MCP API",
     description="提供彩票开奖数据查询和分析的HTTP API接口",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # 添加CORS中间件
@@ -39,19 +57,151 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 响应模型：用于接口文档与返回结构约定
+# 接口直接返回 ORJSONResponse，跳过 FastAPI 的 jsonable_encoder 与二次校验
+# timestamp 直接使用 datetime 对象，由 orjson 序列化为 ISO 8601 字符串
+class LotteryData(BaseModel):
+    """开奖结果"""
+    lottery_type: str
+    period: str
+    draw_date: str
+    numbers: List[str]
+    special_numbers: Optional[List[str]] = None
+    prize_pool: Optional[str] = None
+    sales_amount: Optional[str] = None
+
+class LatestResponse(BaseModel):
+    """最新开奖结果响应"""
+    success: bool
+    data: LotteryData
+    timestamp: datetime
+
+class HistoricalResponse(BaseModel):
+    """历史开奖数据响应"""
+    success: bool
+    data: List[LotteryData]
+    count: int
+    timestamp: datetime
+
+class PredictionData(BaseModel):
+    """单组预测结果"""
+    numbers: List[str]
+    special_numbers: Optional[List[str]] = None
+    confidence: float
+    method: str
+    timestamp: str
+    metadata: Optional[Dict[str, Any]] = None
+
+class PredictionResponse(BaseModel):
+    """预测结果响应"""
+    success: bool
+    data: List[PredictionData]
+    timestamp: datetime
+
+class BacktestData(BaseModel):
+    """回测摘要"""
+    total_periods: int
+    average_accuracy: float
+    best_strategy: str
+    strategy_performance: Dict[str, float]
+    chart_data: Dict[str, Any]
+    timestamp: str
+
+class BacktestResponse(BaseModel):
+    """回测结果响应"""
+    success: bool
+    data: BacktestData
+    timestamp: datetime
+
+# API路径中的彩票类型代码 -> 中文名称
+LOTTERY_TYPE_MAP: Dict[str, str] = {
+    "ssq": "双色球",
+    "3d": "福彩3D",
+    "qlc": "七乐彩",
+    "kl8": "快乐8"
+}
+
+# 各彩票类型的候选号码全集，用于号码分析补0计数
+NUMBER_UNIVERSE: Dict[str, Tuple[str, ...]] = {
+    # 红1-33 + 蓝1-16（蓝球号码包含在红球范围内）
+    "双色球": tuple(f"{i:02d}" for i in range(1, 34)),
+    "福彩3D": tuple(str(i) for i in range(10)),
+    "七乐彩": tuple(f"{i:02d}" for i in range(1, 31)),
+    "快乐8": tuple(f"{i:02d}" for i in range(1, 81)),
+}
+
+# 响应缓存：key -> (过期时间, 数据库写入版本, 已序列化的响应体)
+RESPONSE_CACHE_MAX_ENTRIES = 512
+_response_cache: Dict[str, Tuple[float, int, bytes]] = {}
+
+def cached(ttl: int, key_fn: Callable[..., Optional[str]]):
+    """
+    缓存GET接口的成功响应（进程内TTL缓存）
+    
+    缓存的是orjson序列化后的响应体，命中时直接返回字节，跳过查询与序列化。
+    数据库写入新数据（任意同步或网络更新）后写入版本变化，旧响应不再命中。
+    接口抛出异常时不缓存。
+    
+    Args:
+        ttl: 缓存有效期（秒）
+        key_fn: 根据接口参数生成缓存键，返回None表示本次请求不走缓存
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = key_fn(**kwargs)
+            if key is None:
+                return await func(*args, **kwargs)
+            now = time.monotonic()
+            # 执行前记录写入版本：执行期间若有新数据写入，本次响应按旧版本缓存，下次请求即失效
+            version = lottery_service.db.write_version
+            entry = _response_cache.get(key)
+            if entry and entry[0] > now and entry[1] == version:
+                return Response(content=entry[2], media_type="application/json")
+            
+            result = await func(*args, **kwargs)
+            body = result.body if isinstance(result, Response) else ORJSONResponse(result).body
+            if len(_response_cache) >= RESPONSE_CACHE_MAX_ENTRIES:
+                # 先清理过期项，仍然已满则淘汰最早写入的一项
+                for k in [k for k, (expires, _, _) in _response_cache.items() if expires <= now]:
+                    del _response_cache[k]
+                if len(_response_cache) >= RESPONSE_CACHE_MAX_ENTRIES:
+                    del _response_cache[next(iter(_response_cache))]
+            _response_cache[key] = (now + ttl, version, body)
+            return Response(content=body, media_type="application/json")
+        return wrapper
+    return decorator
+
+def to_history_records(results: List[LotteryResult]) -> List[Dict[str, Any]]:
+    """将开奖结果转换为预测/回测引擎使用的历史记录格式（仅保留所需字段）"""
+    return [{
+        'period': r.period,
+        'numbers': r.numbers,
+        'special_numbers': r.special_numbers,
+        'draw_date': r.draw_date
+    } for r in results]
+
 # 初始化彩票服务
 lottery_service = SWLCService()
 
-# 初始化预测和回测引擎
-prediction_manager = PredictionManager()
-backtest_engine = BacktestEngine()
+# 彩票类型代码 -> 获取最新开奖结果的方法
+LATEST_DISPATCH = {
+    "ssq": lottery_service.get_ssq_latest,
+    "3d": lottery_service.get_3d_latest,
+    "qlc": lottery_service.get_qlc_latest,
+    "kl8": lottery_service.get_kl8_latest
+}
+
+# 预测和回测引擎直接复用彩票服务已创建的实例，不再重复构造
+prediction_manager = lottery_service.prediction_manager
+backtest_engine = lottery_service.backtest_engine
 
 # 获取项目根目录和静态文件目录
 BASE_DIR = Path(__file__).parent.parent.parent
 STATIC_DIR = BASE_DIR / "web" / "public"
 
 @app.get("/", response_class=HTMLResponse)
-async def root():
+def root():
     """返回前端页面"""
     index_file = STATIC_DIR / "index.html"
     if index_file.exists():
@@ -74,7 +224,7 @@ async def api_info():
     return {
         "message": "SWLC MCP API服务",
         "version": "1.0.0",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": datetime.now(),
         "endpoints": {
             "latest": "/api/latest/{lottery_type}",
             "historical": "/api/historical/{lottery_type}",
@@ -94,35 +244,22 @@ async def api_info():
         }
     }
 
-@app.get("/api/latest/{lottery_type}")
+@app.get("/api/latest/{lottery_type}", response_model=LatestResponse)
+@cached(ttl=30, key_fn=lambda lottery_type: f"latest:{lottery_type}")
 async def get_latest_result(lottery_type: str):
     """获取最新开奖结果"""
     try:
-        if lottery_type == "ssq":
-            result = await lottery_service.get_ssq_latest()
-        elif lottery_type == "3d":
-            result = await lottery_service.get_3d_latest()
-        elif lottery_type == "qlc":
-            result = await lottery_service.get_qlc_latest()
-        elif lottery_type == "kl8":
-            result = await lottery_service.get_kl8_latest()
-        else:
+        fetch_latest = LATEST_DISPATCH.get(lottery_type)
+        if not fetch_latest:
             raise HTTPException(status_code=400, detail="不支持的彩票类型")
+        result = await fetch_latest()
         
         if result:
-            return {
+            return ORJSONResponse({
                 "success": True,
-                "data": {
-                    "lottery_type": result.lottery_type,
-                    "period": result.period,
-                    "draw_date": result.draw_date,
-                    "numbers": result.numbers,
-                    "special_numbers": result.special_numbers,
-                    "prize_pool": result.prize_pool,
-                    "sales_amount": result.sales_amount
-                },
-                "timestamp": datetime.now().isoformat()
-            }
+                "data": result.to_dict(),
+                "timestamp": datetime.now()
+            })
         else:
             raise HTTPException(status_code=404, detail="未找到开奖数据")
             
@@ -130,45 +267,36 @@ async def get_latest_result(lottery_type: str):
         logger.error(f"获取最新开奖结果失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/historical/{lottery_type}")
+@app.get("/api/historical/{lottery_type}", response_model=HistoricalResponse)
+@cached(ttl=120, key_fn=lambda lottery_type, periods, stream: None if stream else f"hist:{lottery_type}:{periods}")
 async def get_historical_data(
     lottery_type: str, 
-    periods: int = Query(10, ge=1, le=1000, description="获取期数")
+    periods: int = Query(10, ge=1, le=1000, description="获取期数"),
+    stream: bool = Query(False, description="以NDJSON流式返回（每行一期数据）")
 ):
     """获取历史开奖数据"""
     try:
-        lottery_type_map = {
-            "ssq": "双色球",
-            "3d": "福彩3D", 
-            "qlc": "七乐彩",
-            "kl8": "快乐8"
-        }
-        
-        chinese_type = lottery_type_map.get(lottery_type)
+        chinese_type = LOTTERY_TYPE_MAP.get(lottery_type)
         if not chinese_type:
             raise HTTPException(status_code=400, detail="不支持的彩票类型")
         
         results = await lottery_service.get_historical_data(chinese_type, periods)
         
-        if results:
-            data = []
-            for result in results:
-                data.append({
-                    "lottery_type": result.lottery_type,
-                    "period": result.period,
-                    "draw_date": result.draw_date,
-                    "numbers": result.numbers,
-                    "special_numbers": result.special_numbers,
-                    "prize_pool": result.prize_pool,
-                    "sales_amount": result.sales_amount
-                })
+        if results and stream:
+            async def generate_lines():
+                for result in results:
+                    yield orjson.dumps(result.to_dict()) + b"\n"
             
-            return {
+            return StreamingResponse(generate_lines(), media_type="application/x-ndjson")
+        elif results:
+            data = [result.to_dict() for result in results]
+            
+            return ORJSONResponse({
                 "success": True,
                 "data": data,
                 "count": len(data),
-                "timestamp": datetime.now().isoformat()
-            }
+                "timestamp": datetime.now()
+            })
         else:
             raise HTTPException(status_code=404, detail="未找到历史数据")
             
@@ -177,20 +305,14 @@ async def get_historical_data(
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/analysis/{lottery_type}")
+@cached(ttl=300, key_fn=lambda lottery_type, periods: f"analysis:{lottery_type}:{periods}")
 async def get_number_analysis(
     lottery_type: str,
     periods: int = Query(30, ge=5, le=1000, description="分析期数")
 ):
     """获取号码分析"""
     try:
-        lottery_type_map = {
-            "ssq": "双色球",
-            "3d": "福彩3D", 
-            "qlc": "七乐彩",
-            "kl8": "快乐8"
-        }
-        
-        chinese_type = lottery_type_map.get(lottery_type)
+        chinese_type = LOTTERY_TYPE_MAP.get(lottery_type)
         if not chinese_type:
             raise HTTPException(status_code=400, detail="不支持的彩票类型")
         
@@ -199,45 +321,21 @@ async def get_number_analysis(
         if not results:
             raise HTTPException(status_code=404, detail="未找到数据进行分析")
         
+        # 候选号码全集（同时作为频次统计的键集合）
+        universe = NUMBER_UNIVERSE.get(chinese_type, ())
+        
         # 基于本次 results 直接计算频次，严格遵循 periods
-        def norm(n: str) -> str:
-            try:
-                return f"{int(n):02d}"
-            except Exception:
-                return n
-        freq: Dict[str, int] = {}
-        for r in results:
-            for n in (r.numbers or []):
-                nn = norm(n)
-                freq[nn] = freq.get(nn, 0) + 1
-            for n in (r.special_numbers or []):
-                nn = norm(n)
-                freq[nn] = freq.get(nn, 0) + 1
-        
-        # 若 distinct 数量过少，用候选全集补0计数，保证可选数量
-        def build_universe(ltype: str) -> List[str]:
-            if ltype == "双色球":
-                # 红1-33 + 蓝1-16
-                red = [f"{i:02d}" for i in range(1, 34)]
-                blue = [f"{i:02d}" for i in range(1, 17)]
-                return list(dict.fromkeys(red + blue))
-            if ltype == "福彩3D":
-                return [str(i) for i in range(10)]
-            if ltype == "七乐彩":
-                base = [f"{i:02d}" for i in range(1, 31)]
-                return base
-            if ltype == "快乐8":
-                return [f"{i:02d}" for i in range(1, 81)]
-            return []
-        universe = build_universe(chinese_type)
-        for u in universe:
-            if u not in freq:
-                freq[u] = 0
-        
-        # 排序与分配热门/冷门
-        sorted_all = sorted(freq.items(), key=lambda x: (-x[1], int(x[0]) if x[0].isdigit() else 0))
-        asc_all = list(reversed(sorted_all))
-        total = len(sorted_all)
+        # 按整数值计数（Counter 在 C 层完成累加），再映射回全集，未出现的号码计 0
+        counts = Counter(
+            int(n)
+            for r in results
+            for n in (r.numbers or []) + (r.special_numbers or [])
+            if n.isdigit()
+        )
+        freq: Dict[str, int] = {u: counts.get(int(u), 0) for u in universe}
+        
+        # 分配热门/冷门：热门按频次降序、号码升序；冷门按频次升序、号码降序
+        total = len(freq)
         
         # 至少5，最多10，且确保另一侧也能至少5
         k = max(5, min(10, total // 2))
@@ -245,15 +343,13 @@ async def get_number_analysis(
             k = max(5, total - 5)
         k = max(5, min(k, total))
         
-        hot_pairs = sorted_all[:k]
+        hot_pairs = heapq.nlargest(k, freq.items(), key=lambda x: (x[1], -int(x[0])))
         hot_set = {k for k, _ in hot_pairs}
-        cold_pairs: List[Any] = []
-        for knum, v in asc_all:
-            if knum in hot_set:
-                continue
-            cold_pairs.append((knum, v))
-            if len(cold_pairs) >= k:
-                break
+        cold_pairs = heapq.nsmallest(
+            k,
+            (item for item in freq.items() if item[0] not in hot_set),
+            key=lambda x: (x[1], -int(x[0]))
+        )
         
         hot_obj = {k2: int(v2) for k2, v2 in hot_pairs}
         cold_obj = {k2: int(v2) for k2, v2 in cold_pairs}
@@ -266,9 +362,9 @@ async def get_number_analysis(
                 "hot_numbers": hot_obj,
                 "cold_numbers": cold_obj,
                 # 连号分析暂保留为基于 analyze 的结果（不影响热门冷门）
-                "consecutive_analysis": lottery_service.analyze_numbers(results).consecutive_analysis
+                "consecutive_analysis": lottery_service.analyze_consecutive(results)
             },
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now()
         }
             
     except Exception as e:
@@ -288,13 +384,7 @@ async def analyze_seq_numbers(
     - 详情包含命中次数 / 窗口数
     """
     try:
-        lottery_type_map = {
-            "ssq": "双色球",
-            "3d": "福彩3D",
-            "qlc": "七乐彩",
-            "kl8": "快乐8"
-        }
-        chinese_type = lottery_type_map.get(lottery_type)
+        chinese_type = LOTTERY_TYPE_MAP.get(lottery_type)
         if not chinese_type:
             raise HTTPException(status_code=400, detail="不支持的彩票类型")
         
@@ -317,7 +407,7 @@ async def analyze_seq_numbers(
                 "counts": result["counts"],
                 "max_run_distribution": result["max_run_distribution"],
             },
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now()
         }
     except HTTPException:
         raise
@@ -332,32 +422,26 @@ async def get_random_numbers(
 ):
     """生成随机号码"""
     try:
-        lottery_type_map = {
-            "ssq": "双色球",
-            "3d": "福彩3D", 
-            "qlc": "七乐彩",
-            "kl8": "快乐8"
-        }
-        
-        chinese_type = lottery_type_map.get(lottery_type)
+        chinese_type = LOTTERY_TYPE_MAP.get(lottery_type)
         if not chinese_type:
             raise HTTPException(status_code=400, detail="不支持的彩票类型")
         
-        results = []
-        for i in range(count):
-            random_result = lottery_service.generate_random_numbers(chinese_type)
-            results.append({
-                "index": i + 1,
-                "lottery_type": chinese_type,
-                "numbers": random_result,
-                "format": random_result['format']
-            })
+        # 一次批量生成，在线程池中执行以免占用事件循环
+        batch = await asyncio.to_thread(
+            lottery_service.generate_random_numbers_batch, chinese_type, count
+        )
+        results = [{
+            "index": i + 1,
+            "lottery_type": chinese_type,
+            "numbers": random_result,
+            "format": random_result['format']
+        } for i, random_result in enumerate(batch)]
         
         return {
             "success": True,
             "data": results,
             "count": len(results),
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now()
         }
         
     except Exception as e:
@@ -371,14 +455,7 @@ async def sync_lottery_data(
 ):
     """同步彩票数据"""
     try:
-        lottery_type_map = {
-            "ssq": "双色球",
-            "3d": "福彩3D", 
-            "qlc": "七乐彩",
-            "kl8": "快乐8"
-        }
-        
-        chinese_type = lottery_type_map.get(lottery_type)
+        chinese_type = LOTTERY_TYPE_MAP.get(lottery_type)
         if not chinese_type:
             raise HTTPException(status_code=400, detail="不支持的彩票类型")
         
@@ -393,7 +470,7 @@ async def sync_lottery_data(
                 "synced_periods": len(results),
                 "requested_periods": periods
             },
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now()
         }
         
     except Exception as e:
@@ -407,14 +484,7 @@ async def force_sync_lottery_data(
 ):
     """强制同步彩票数据（忽略数据新鲜度检查）"""
     try:
-        lottery_type_map = {
-            "ssq": "双色球",
-            "3d": "福彩3D", 
-            "qlc": "七乐彩",
-            "kl8": "快乐8"
-        }
-        
-        chinese_type = lottery_type_map.get(lottery_type)
+        chinese_type = LOTTERY_TYPE_MAP.get(lottery_type)
         if not chinese_type:
             raise HTTPException(status_code=400, detail="不支持的彩票类型")
         
@@ -422,6 +492,8 @@ async def force_sync_lottery_data(
         sync_result = await lottery_service.force_sync_data(chinese_type, periods)
         
         if sync_result["success"]:
+            # 数据已更新，丢弃历史频次分析（缓存的响应随数据库写入版本自动失效）
+            prediction_manager.rule_predictor.invalidate_cache()
             return {
                 "success": True,
                 "message": sync_result["message"],
@@ -431,7 +503,7 @@ async def force_sync_lottery_data(
                     "total_available": sync_result["total_available"],
                     "requested_periods": periods
                 },
-                "timestamp": datetime.now().isoformat()
+                "timestamp": datetime.now()
             }
         else:
             raise HTTPException(status_code=500, detail=sync_result["message"])
@@ -441,7 +513,7 @@ async def force_sync_lottery_data(
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/database/info")
-async def get_database_info():
+def get_database_info():
     """获取数据库信息"""
     try:
         info = lottery_service.db.get_database_info()
@@ -458,14 +530,14 @@ async def get_database_info():
                 "last_sync": info.get('last_sync', {}),
                 "database_path": lottery_service.db.db_path
             },
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now()
         }
         
     except Exception as e:
         logger.error(f"获取数据库信息失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/predict/{lottery_type}")
+@app.get("/api/predict/{lottery_type}", response_model=PredictionResponse)
 async def get_prediction(
     lottery_type: str,
     method: str = Query("rule", description="预测方法: rule"),
@@ -474,25 +546,13 @@ async def get_prediction(
 ):
     """获取预测结果（支持策略）"""
     try:
-        # 统一类型映射
-        lottery_type_map = {
-            "ssq": "双色球",
-            "3d": "福彩3D",
-            "qlc": "七乐彩",
-            "kl8": "快乐8"
-        }
-        chinese_type = lottery_type_map.get(lottery_type, lottery_type)
+        chinese_type = LOTTERY_TYPE_MAP.get(lottery_type, lottery_type)
         
         # 历史数据用于预测
         hist = await lottery_service.get_historical_data(chinese_type, 120)
         if not hist:
             raise HTTPException(status_code=404, detail="历史数据不足")
-        history_dict = [{
-            'period': r.period,
-            'numbers': r.numbers,
-            'special_numbers': r.special_numbers,
-            'draw_date': r.draw_date
-        } for r in hist]
+        history_dict = to_history_records(hist)
         
         preds = await prediction_manager.predict(chinese_type, history_dict, method=method, count=count, strategy=strategy)
         
@@ -506,16 +566,16 @@ async def get_prediction(
                 'timestamp': p.timestamp,
                 'metadata': p.metadata
             })
-        return {
+        return ORJSONResponse({
             "success": True,
             "data": out,
-            "timestamp": datetime.now().isoformat()
-        }
+            "timestamp": datetime.now()
+        })
     except Exception as e:
         logger.error(f"预测失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/api/backtest/{lottery_type}")
+@app.get("/api/backtest/{lottery_type}", response_model=BacktestResponse)
 async def run_backtest(
     lottery_type: str,
     window_size: int = Query(100, ge=50, le=500, description="窗口大小"),
@@ -523,15 +583,7 @@ async def run_backtest(
 ):
     """运行回测分析"""
     try:
-        # 类型映射
-        lottery_type_map = {
-            "ssq": "双色球",
-            "3d": "福彩3D", 
-            "qlc": "七乐彩",
-            "kl8": "快乐8"
-        }
-        
-        chinese_type = lottery_type_map.get(lottery_type)
+        chinese_type = LOTTERY_TYPE_MAP.get(lottery_type)
         if not chinese_type:
             raise HTTPException(status_code=400, detail="不支持的彩票类型")
         
@@ -542,21 +594,14 @@ async def run_backtest(
             raise HTTPException(status_code=400, detail=f"历史数据不足，需要至少{window_size}期数据")
         
         # 转换为字典格式
-        history_dict = []
-        for result in historical_data:
-            history_dict.append({
-                'period': result.period,
-                'numbers': result.numbers,
-                'special_numbers': result.special_numbers,
-                'draw_date': result.draw_date
-            })
+        history_dict = to_history_records(historical_data)
         
         # 执行回测
         backtest_result = await backtest_engine.run_backtest(
             lottery_type, history_dict, window_size=window_size, step=step
         )
         
-        return {
+        return ORJSONResponse({
             "success": True,
             "data": {
                 "total_periods": backtest_result.total_periods,
@@ -566,15 +611,15 @@ async def run_backtest(
                 "chart_data": backtest_result.chart_data,
                 "timestamp": backtest_result.timestamp
             },
-            "timestamp": datetime.now().isoformat()
-        }
+            "timestamp": datetime.now()
+        })
         
     except Exception as e:
         logger.error(f"回测失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/settings")
-async def get_settings():
+def get_settings():
     """获取系统设置"""
     try:
         # 这里将来会从配置文件或数据库读取设置
@@ -588,7 +633,7 @@ async def get_settings():
         return {
             "success": True,
             "data": settings,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now()
         }
         
     except Exception as e:
@@ -596,7 +641,7 @@ async def get_settings():
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/api/settings")
-async def save_settings(settings: Dict[str, Any]):
+def save_settings(settings: Dict[str, Any]):
     """保存系统设置"""
     try:
         # 这里将来会保存到配置文件或数据库
@@ -605,7 +650,7 @@ async def save_settings(settings: Dict[str, Any]):
         return {
             "success": True,
             "message": "设置保存成功",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now()
         }
         
     except Exception as e:
@@ -613,12 +658,12 @@ async def save_settings(settings: Dict[str, Any]):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/health")
-async def health_check():
+def health_check():
     """健康检查"""
     return {
         "status": "healthy",
         "service": "SWLC MCP API",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": datetime.now(),
         "database": "connected" if lottery_service.db else "disconnected"
     }
 
@@ -633,7 +678,20 @@ else:
 def start_api_server(host: str = "0.0.0.0", port: int = 8000):
     """启动API服务器"""
     logger.info(f"启动HTTP API服务器: http://{host}:{port}")
-    uvicorn.run(app, host=host, port=port)
+    # Windows 不支持 uvloop，回退到标准 asyncio 事件循环
+    loop = "asyncio" if sys.platform == "win32" else "uvloop"
+    uvicorn.run(
+        app,
+        host=host,
+        port=port,
+        loop=loop,
+        http="httptools",
+        log_level="info",
+        # 保持连接复用，提高持续请求下的吞吐
+        timeout_keep_alive=30,
+        limit_concurrency=1024,
+        backlog=2048
+    )
 
 if __name__ == "__main__":
     start_api_server()
@@ -3,15 +3,24 @@
 提供历史数据回测功能，评估预测算法的准确性
 """
 
+import asyncio
 import logging
-from typing import List, Dict, Any, Optional
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Iterable, Tuple
 from dataclasses import dataclass
 from datetime import datetime
 
-from .predictor import PredictionManager
+from .predictor import PredictionManager, SSQ_RED_NUMBERS, SSQ_BLUE_NUMBERS
 
 logger = logging.getLogger(__name__)
 
+def _to_mask(numbers: Iterable[str]) -> int:
+    """将号码列表转换为整数位掩码（第n位表示号码n），命中数即按位与后的1的个数"""
+    mask = 0
+    for n in numbers:
+        mask |= 1 << int(n)
+    return mask
+
 @dataclass
 class BacktestResult:
     """回测结果"""
@@ -38,6 +47,8 @@ class BacktestEngine:
     def __init__(self):
         self.prediction_manager = PredictionManager()
         self.methods = ['rule']
+        # 回测时同时进行的预测任务上限
+        self.max_concurrency = 10
     
     async def run_backtest(self, lottery_type: str, historical_data: List[Dict], 
                           window_size: int = 100, step: int = 50) -> BacktestSummary:
@@ -53,26 +64,49 @@ class BacktestEngine:
                 'precision': []
             }
             
-            # 滑动窗口回测
-            for start_idx in range(0, len(historical_data) - window_size, step):
-                end_idx = start_idx + window_size
+            # 滑动窗口起点（目标期为窗口之后的一期）
+            window_starts = list(range(0, len(historical_data) - window_size, step))
+            
+            # 双色球各窗口频次由前缀和直接得出，预测时无需再遍历窗口数据
+            window_frequencies = {}
+            if lottery_type in ('ssq', '双色球'):
+                window_frequencies = self._ssq_window_frequencies(
+                    historical_data, window_starts, window_size
+                )
+            
+            # 所有窗口 × 方法的预测并发执行，限制同时进行的预测数量
+            semaphore = asyncio.Semaphore(self.max_concurrency)
+            tasks = [(s, m) for s in window_starts for m in self.methods]
+            # 按任务顺序预先派生各自的随机数生成器，并发执行顺序不影响回测结果
+            rule_predictor = self.prediction_manager.rule_predictor
+            rngs = [rule_predictor.spawn_rng() for _ in tasks]
+            
+            async def predict_window(start_idx: int, method: str, rng):
+                async with semaphore:
+                    return await self.prediction_manager.predict(
+                        lottery_type, historical_data[start_idx:start_idx + window_size],
+                        method=method, count=5,
+                        frequencies=window_frequencies.get(start_idx), rng=rng
+                    )
+            
+            all_predictions = await asyncio.gather(
+                *(predict_window(s, m, rng) for (s, m), rng in zip(tasks, rngs)),
+                return_exceptions=True
+            )
+            
+            for i, start_idx in enumerate(window_starts):
                 test_period = start_idx + window_size
-                
-                if test_period >= len(historical_data):
-                    break
-                
-                # 训练数据（历史数据）
-                train_data = historical_data[start_idx:end_idx]
                 # 测试数据（目标期）
                 test_data = historical_data[test_period]
                 
-                # 为每个方法生成预测
+                # 汇总每个方法的预测结果
                 method_results = {}
-                for method in self.methods:
+                for j, method in enumerate(self.methods):
+                    predictions = all_predictions[i * len(self.methods) + j]
                     try:
-                        predictions = await self.prediction_manager.predict(
-                            lottery_type, train_data, method=method, count=5
-                        )
+                        # 并发预测中的异常在此重新抛出，与评分失败一并按该方法得0分处理
+                        if isinstance(predictions, Exception):
+                            raise predictions
                         
                         # 计算预测准确性
                         accuracy = self._calculate_prediction_accuracy(
@@ -117,6 +151,41 @@ class BacktestEngine:
             logger.error(f"回测失败: {e}")
             raise
     
+    def _ssq_window_frequencies(self, historical_data: List[Dict], window_starts: List[int],
+                                window_size: int) -> Dict[int, Tuple[Dict[str, int], Dict[str, int]]]:
+        """
+        基于前缀和计算双色球各窗口的红球/蓝球频次
+        
+        整段数据只遍历一次，每个窗口的频次为两个前缀计数之差，
+        回测总开销从 O(窗口数 × 窗口大小) 降为 O(数据量)。
+        数据格式异常时返回空字典，由预测器自行统计。
+        """
+        try:
+            red_prefix = [[0] * 34]
+            blue_prefix = [[0] * 17]
+            for d in historical_data:
+                red = red_prefix[-1][:]
+                for n in d.get('numbers', []):
+                    red[int(n)] += 1
+                blue = blue_prefix[-1][:]
+                for n in (d.get('special_numbers') or []):
+                    blue[int(n)] += 1
+                red_prefix.append(red)
+                blue_prefix.append(blue)
+        except (ValueError, IndexError) as e:
+            logger.warning(f"计算窗口频次失败，改由预测器统计: {e}")
+            return {}
+        
+        frequencies = {}
+        for start in window_starts:
+            end = start + window_size
+            red_end, red_start = red_prefix[end], red_prefix[start]
+            blue_end, blue_start = blue_prefix[end], blue_prefix[start]
+            red_freq = {n: red_end[i] - red_start[i] for i, n in enumerate(SSQ_RED_NUMBERS, 1)}
+            blue_freq = {n: blue_end[i] - blue_start[i] for i, n in enumerate(SSQ_BLUE_NUMBERS, 1)}
+            frequencies[start] = (red_freq, blue_freq)
+        return frequencies
+    
     def _calculate_prediction_accuracy(self, predictions: List, actual_data: Dict, 
                                      lottery_type: str) -> float:
         """计算预测准确性"""
@@ -126,6 +195,10 @@ class BacktestEngine:
         actual_numbers = actual_data.get('numbers', [])
         actual_special_numbers = actual_data.get('special_numbers', [])
         
+        # 实际号码位掩码每期只构建一次，供所有预测组复用
+        actual_mask = _to_mask(actual_numbers)
+        actual_special_mask = _to_mask(actual_special_numbers or ())
+        
         best_accuracy = 0.0
         
         for prediction in predictions:
@@ -133,22 +206,25 @@ class BacktestEngine:
             pred_special_numbers = prediction.special_numbers or []
             
             # 计算红球命中数
-            red_hits = len(set(pred_numbers) & set(actual_numbers))
+            red_hits = (_to_mask(pred_numbers) & actual_mask).bit_count()
             
             # 计算蓝球命中数
             blue_hits = 0
-            if pred_special_numbers and actual_special_numbers:
-                blue_hits = len(set(pred_special_numbers) & set(actual_special_numbers))
+            if pred_special_numbers and actual_special_mask:
+                blue_hits = (_to_mask(pred_special_numbers) & actual_special_mask).bit_count()
             
             # 根据彩票类型计算准确性（支持中英文类型）
             if lottery_type in ('ssq', '双色球'):
-                accuracy = self._calculate_ssq_accuracy(red_hits, blue_hits)
+                # 红球6个占80%，蓝球1个占20%
+                accuracy = red_hits / 6.0 * 0.8 + blue_hits * 0.2
             elif lottery_type in ('3d', '福彩3D'):
                 accuracy = self._calculate_3d_accuracy(pred_numbers, actual_numbers)
             elif lottery_type in ('qlc', '七乐彩'):
-                accuracy = self._calculate_qlc_accuracy(red_hits, blue_hits)
+                # 基本号7个占80%，特别号1个占20%
+                accuracy = red_hits / 7.0 * 0.8 + blue_hits * 0.2
             elif lottery_type in ('kl8', '快乐8'):
-                accuracy = self._calculate_kl8_accuracy(pred_numbers, actual_numbers)
+                # 快乐8每期开出20个号码
+                accuracy = red_hits / 20.0
             else:
                 accuracy = red_hits / len(actual_numbers) if actual_numbers else 0.0
             
@@ -156,12 +232,6 @@ class BacktestEngine:
         
         return round(best_accuracy, 4)
     
-    def _calculate_ssq_accuracy(self, red_hits: int, blue_hits: int) -> float:
-        """计算双色球准确性"""
-        red_accuracy = red_hits / 6.0
-        blue_accuracy = blue_hits / 1.0
-        return red_accuracy * 0.8 + blue_accuracy * 0.2
-    
     def _calculate_3d_accuracy(self, pred_numbers: List[str], actual_numbers: List[str]) -> float:
         """计算福彩3D准确性"""
         if len(pred_numbers) != 3 or len(actual_numbers) != 3:
@@ -174,17 +244,6 @@ class BacktestEngine:
         
         return hits / 3.0
     
-    def _calculate_qlc_accuracy(self, red_hits: int, blue_hits: int) -> float:
-        """计算七乐彩准确性"""
-        red_accuracy = red_hits / 7.0
-        blue_accuracy = blue_hits / 1.0
-        return red_accuracy * 0.8 + blue_accuracy * 0.2
-    
-    def _calculate_kl8_accuracy(self, pred_numbers: List[str], actual_numbers: List[str]) -> float:
-        """计算快乐8准确性"""
-        hits = len(set(pred_numbers) & set(actual_numbers))
-        return hits / 20.0
-    
     def _calculate_precision(self, method_results: Dict[str, Dict]) -> float:
         """计算精确度"""
         if not method_results:
@@ -207,15 +266,21 @@ class BacktestEngine:
             )
         
         total_periods = len(results)
-        average_accuracy = sum(r.accuracy for r in results) / total_periods
         
-        strategy_performance = {}
-        for method in self.methods:
-            method_results = [r for r in results if r.method == method]
-            if method_results:
-                strategy_performance[method] = sum(r.accuracy for r in method_results) / len(method_results)
-            else:
-                strategy_performance[method] = 0.0
+        # 一次遍历同时累计总准确率与各方法的准确率
+        total_accuracy = 0.0
+        method_sums: Dict[str, float] = defaultdict(float)
+        method_counts: Dict[str, int] = defaultdict(int)
+        for r in results:
+            total_accuracy += r.accuracy
+            method_sums[r.method] += r.accuracy
+            method_counts[r.method] += 1
+        average_accuracy = total_accuracy / total_periods
+        
+        strategy_performance = {
+            method: method_sums[method] / method_counts[method] if method_counts[method] else 0.0
+            for method in self.methods
+        }
         
         best_strategy = max(strategy_performance.items(), key=lambda x: x[1])[0]
         
@@ -6,21 +6,129 @@
 import sqlite3
 import json
 import logging
+import threading
+import queue
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple, Iterable, Union
 from dataclasses import dataclass
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
+# 只读连接池大小：WAL 模式下多个读连接可与写连接并发
+READ_POOL_SIZE = 4
+
+def _pack_numbers(numbers: Union[List[str], str]) -> str:
+    """将号码列表编码为逗号分隔字符串存储（如 01,02,03），已是该格式的字符串原样返回"""
+    if isinstance(numbers, str):
+        return numbers
+    return ",".join(numbers)
+
+def _unpack_numbers(value: str) -> List[str]:
+    """解码号码字符串，兼容旧版本写入的JSON数组格式"""
+    if not value:
+        return []
+    if value[0] == "[":
+        return json.loads(value)
+    return value.split(",")
+
+# 游标级 row_factory：直接由行元组构造结果字典（字面量构造，省去 sqlite3.Row 中间对象），
+# 键与列顺序需与 _RESULT_TABLES 中的查询列一致
+def _ssq_row(_cursor, row) -> Dict[str, Any]:
+    return {"period": row[0], "draw_date": row[1], "red_balls": _unpack_numbers(row[2]),
+            "blue_ball": row[3], "prize_pool": row[4], "sales_amount": row[5]}
+
+def _3d_row(_cursor, row) -> Dict[str, Any]:
+    return {"period": row[0], "draw_date": row[1], "numbers": _unpack_numbers(row[2]),
+            "sales_amount": row[3]}
+
+def _qlc_row(_cursor, row) -> Dict[str, Any]:
+    return {"period": row[0], "draw_date": row[1], "basic_numbers": _unpack_numbers(row[2]),
+            "special_number": row[3], "prize_pool": row[4], "sales_amount": row[5]}
+
+def _kl8_row(_cursor, row) -> Dict[str, Any]:
+    return {"period": row[0], "draw_date": row[1], "numbers": _unpack_numbers(row[2]),
+            "prize_pool": row[3], "sales_amount": row[4]}
+
+_ROW_FACTORIES = {"双色球": _ssq_row, "福彩3D": _3d_row, "七乐彩": _qlc_row, "快乐8": _kl8_row}
+
+# 各彩票类型的结果表：(表名, 查询列, 号码列)，查询列名即返回字典的键
+_RESULT_TABLES = {
+    "双色球": ("ssq_results",
+              ("period", "draw_date", "red_balls", "blue_ball", "prize_pool", "sales_amount"),
+              "red_balls"),
+    "福彩3D": ("fucai3d_results",
+              ("period", "draw_date", "numbers", "sales_amount"),
+              "numbers"),
+    "七乐彩": ("qilecai_results",
+              ("period", "draw_date", "basic_numbers", "special_number", "prize_pool", "sales_amount"),
+              "basic_numbers"),
+    "快乐8": ("kuaile8_results",
+             ("period", "draw_date", "numbers", "prize_pool", "sales_amount"),
+             "numbers"),
+}
+
+# 预先生成的按期号倒序查询语句：彩票类型 -> (SQL, row_factory)
+_RESULT_QUERIES = {
+    lottery_type: (
+        f"SELECT {', '.join(columns)} FROM {table} ORDER BY period DESC LIMIT ?",
+        _ROW_FACTORIES[lottery_type]
+    )
+    for lottery_type, (table, columns, _) in _RESULT_TABLES.items()
+}
+
+# 预先生成的记录数统计：一条语句返回各开奖结果表的行数（顺序同 _RESULT_TABLES）
+_RESULT_TABLE_NAMES = tuple(table for table, _, _ in _RESULT_TABLES.values())
+_COUNT_RESULTS_SQL = "SELECT " + ", ".join(
+    f"(SELECT COUNT(*) FROM {table})" for table in _RESULT_TABLE_NAMES
+)
+
+# 预先生成的期号摘要查询：彩票类型 -> 返回(最大期号, 记录数)的SQL
+_PERIOD_SUMMARY_SQL = {
+    lottery_type: f"SELECT MAX(period), COUNT(*) FROM {table}"
+    for lottery_type, (table, _, _) in _RESULT_TABLES.items()
+}
+
+# 由 SQLite 生成的本地 ISO 时间戳，免去每行在 Python 中构造时间字符串
+_NOW_SQL = "strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')"
+
+# 预先生成的写入语句：彩票类型 -> SQL（列顺序同查询列，updated_at 由 SQLite 填充）
+# 期号冲突时原地更新（UPSERT），避免 INSERT OR REPLACE 删除旧行再插入带来的索引重建
+_INSERT_SQL = {
+    lottery_type: (
+        f"INSERT INTO {table} ({', '.join(columns)}, updated_at) "
+        f"VALUES ({', '.join('?' * len(columns))}, {_NOW_SQL}) "
+        f"ON CONFLICT(period) DO UPDATE SET "
+        f"{', '.join(f'{column} = excluded.{column}' for column in columns[1:])}, "
+        f"updated_at = excluded.updated_at"
+    )
+    for lottery_type, (table, columns, _) in _RESULT_TABLES.items()
+}
+
+# 号码统计原生 UPSERT：已存在则频次+1
+_UPSERT_NUMBER_STAT_SQL = f"""
+    INSERT INTO number_statistics 
+    (lottery_type, number, frequency, last_appearance, updated_at)
+    VALUES (?, ?, 1, ?, {_NOW_SQL})
+    ON CONFLICT(lottery_type, number) DO UPDATE SET
+        frequency = frequency + 1,
+        last_appearance = excluded.last_appearance,
+        updated_at = excluded.updated_at
+"""
+
+def _to_insert_row(record: Tuple) -> Tuple:
+    """将开奖记录转换为写入参数：各表号码列均位于第三列"""
+    return (record[0], record[1], _pack_numbers(record[2]), *record[3:])
+
 @dataclass
 class LotteryRecord:
     """彩票记录数据类"""
     lottery_type: str
     period: str
     draw_date: str
-    numbers: str  # JSON格式存储
-    special_numbers: Optional[str] = None  # JSON格式存储
+    numbers: str  # 逗号分隔存储
+    special_numbers: Optional[str] = None  # 逗号分隔存储
     prize_pool: Optional[str] = None
     sales_amount: Optional[str] = None
     created_at: Optional[str] = None
@@ -31,14 +139,120 @@ class LotteryDatabase:
     
     def __init__(self, db_path: str = "lottery_data.db"):
         self.db_path = db_path
+        # 复用同一个连接，避免每次操作都重新打开数据库文件；
+        # 连接可能被不同线程使用（如 asyncio.to_thread），由锁保证串行访问
+        # 写入/查询 SQL 均为模块级常量，文本不变即可命中 sqlite3 的预编译语句缓存
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        # 行以 sqlite3.Row 返回，可按列名直接转换为字典
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.RLock()
+        # 持有 batch() 事务的线程标识，未处于批量事务时为 None
+        self._batch_thread: Optional[int] = None
+        # 开奖数据写入版本号：每次保存提交后递增，供上层缓存判断数据是否变化
+        self.write_version = 0
+        # 同步日志写入版本号：每次记录同步日志提交后递增
+        self.sync_version = 0
+        # batch() 事务中待提交后递增的版本号属性名
+        self._pending_versions: set = set()
         self.init_database()
+        # 一个写连接 + N 个只读连接：查询从池中取连接，不必等待写锁
+        self._read_pool: queue.LifoQueue = queue.LifoQueue(maxsize=READ_POOL_SIZE)
+        if db_path != ":memory:":
+            read_uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+            for _ in range(READ_POOL_SIZE):
+                reader = sqlite3.connect(read_uri, uri=True, check_same_thread=False)
+                reader.row_factory = sqlite3.Row
+                reader.execute("PRAGMA mmap_size=268435456")
+                reader.execute("PRAGMA busy_timeout=5000")
+                self._read_pool.put(reader)
+    
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+        while not self._read_pool.empty():
+            self._read_pool.get_nowait().close()
+    
+    @contextmanager
+    def _writer(self):
+        """获取写连接：处于 batch() 中时复用外层事务，否则单独提交"""
+        with self._lock:
+            if self._batch_thread is not None:
+                yield self._conn
+            else:
+                with self._conn as conn:
+                    yield conn
+    
+    @contextmanager
+    def batch(self):
+        """
+        将多次写入合并为一个事务，退出时统一提交（出错则回滚）
+        
+        事务内任一写入失败都会向外抛出异常，整个事务回滚，不会只提交部分数据。
+        
+        用法：
+            with db.batch():
+                for item in items:
+                    db.save_ssq_result(...)
+        """
+        with self._lock:
+            if self._batch_thread is not None:
+                # 嵌套调用并入外层事务
+                yield self
+                return
+            self._batch_thread = threading.get_ident()
+            try:
+                with self._conn:
+                    yield self
+                # 事务提交成功后再递增版本号，回滚时不递增
+                for name in self._pending_versions:
+                    setattr(self, name, getattr(self, name) + 1)
+            finally:
+                self._batch_thread = None
+                self._pending_versions.clear()
+    
+    def _in_batch(self) -> bool:
+        """当前线程是否处于 batch() 事务中（此时写入失败需抛出，由外层回滚）"""
+        return self._batch_thread == threading.get_ident()
+    
+    def _bump_version(self, name: str):
+        """
+        写入提交后递增版本号；处于 batch() 中时推迟到整个事务提交后再递增
+        
+        读连接池不经过写锁，版本号先于提交变化会让并发读取把旧数据缓存在新版本下。
+        """
+        if self._in_batch():
+            self._pending_versions.add(name)
+        else:
+            setattr(self, name, getattr(self, name) + 1)
+    
+    @contextmanager
+    def _reader(self):
+        """从只读连接池借出一个连接；内存数据库无法共享，退回到写连接"""
+        if self.db_path == ":memory:":
+            with self._lock:
+                yield self._conn
+            return
+        conn = self._read_pool.get()
+        try:
+            yield conn
+        finally:
+            self._read_pool.put(conn)
     
     def init_database(self):
         """初始化数据库和表结构"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._lock, self._conn as conn:
                 cursor = conn.cursor()
                 
+                # 连接参数：WAL 日志避免读写互斥，NORMAL 同步级别在 WAL 下仍保证一致性
+                cursor.execute("PRAGMA journal_mode=WAL")
+                cursor.execute("PRAGMA synchronous=NORMAL")
+                cursor.execute("PRAGMA temp_store=MEMORY")
+                cursor.execute("PRAGMA cache_size=-64000")  # 约64MB页缓存
+                cursor.execute("PRAGMA mmap_size=268435456")  # 256MB内存映射
+                cursor.execute("PRAGMA busy_timeout=5000")
+                
                 # 创建彩票类型表
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS lottery_types (
@@ -56,7 +270,7 @@ class LotteryDatabase:
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         period TEXT UNIQUE NOT NULL,
                         draw_date TEXT NOT NULL,
-                        red_balls TEXT NOT NULL,  -- JSON格式: ["01","02","03","04","05","06"]
+                        red_balls TEXT NOT NULL,  -- 逗号分隔: 01,02,03,04,05,06
                         blue_ball TEXT NOT NULL,
                         prize_pool TEXT,
                         sales_amount TEXT,
@@ -71,7 +285,7 @@ class LotteryDatabase:
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         period TEXT UNIQUE NOT NULL,
                         draw_date TEXT NOT NULL,
-                        numbers TEXT NOT NULL,  -- JSON格式: ["2","5","5"]
+                        numbers TEXT NOT NULL,  -- 逗号分隔: 2,5,5
                         sales_amount TEXT,
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                         updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
@@ -84,7 +298,7 @@ class LotteryDatabase:
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         period TEXT UNIQUE NOT NULL,
                         draw_date TEXT NOT NULL,
-                        basic_numbers TEXT NOT NULL,  -- JSON格式: ["01","02","03","04","05","06","07"]
+                        basic_numbers TEXT NOT NULL,  -- 逗号分隔: 01,02,03,04,05,06,07
                         special_number TEXT NOT NULL,
                         prize_pool TEXT,
                         sales_amount TEXT,
@@ -99,7 +313,7 @@ class LotteryDatabase:
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         period TEXT UNIQUE NOT NULL,
                         draw_date TEXT NOT NULL,
-                        numbers TEXT NOT NULL,  -- JSON格式: ["01","02","03",...,"20"]
+                        numbers TEXT NOT NULL,  -- 逗号分隔: 01,02,03,...,20
                         prize_pool TEXT,
                         sales_amount TEXT,
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -134,6 +348,20 @@ class LotteryDatabase:
                     )
                 """)
                 
+                # 创建索引：按期号倒序取最新/历史数据，按频次读取号码统计，按类型汇总同步时间
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_ssq_period ON ssq_results(period DESC)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_fucai3d_period ON fucai3d_results(period DESC)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_qilecai_period ON qilecai_results(period DESC)")
+                cursor.execute("CREATE INDEX IF NOT EXISTS idx_kuaile8_period ON kuaile8_results(period DESC)")
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_numstat_lt_freq
+                    ON number_statistics(lottery_type, frequency DESC)
+                """)
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_sync_lt_date
+                    ON sync_logs(lottery_type, sync_date DESC)
+                """)
+                
                 # 插入彩票类型数据
                 lottery_types = [
                     ('双色球', 'ssq', '红球33选6+蓝球16选1'),
@@ -154,301 +382,133 @@ class LotteryDatabase:
             logger.error(f"数据库初始化失败: {e}")
             raise
     
-    def save_ssq_result(self, period: str, draw_date: str, red_balls: List[str], 
-                       blue_ball: str, prize_pool: Optional[str] = None, 
-                       sales_amount: Optional[str] = None) -> bool:
-        """保存双色球开奖结果"""
+    def save_result(self, lottery_type: str, record: Tuple) -> bool:
+        """
+        保存单期开奖结果
+        
+        Args:
+            lottery_type: 彩票类型
+            record: 按 _RESULT_TABLES 中查询列顺序排列的元组，号码列为列表或逗号分隔字符串
+            
+        Returns:
+            bool: 是否保存成功
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    INSERT OR REPLACE INTO ssq_results 
-                    (period, draw_date, red_balls, blue_ball, prize_pool, sales_amount, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    period, draw_date, json.dumps(red_balls), blue_ball,
-                    prize_pool, sales_amount, datetime.now().isoformat()
-                ))
-                
-                conn.commit()
-                logger.info(f"保存双色球数据成功: {period}")
-                return True
+            with self._writer() as conn:
+                conn.execute(_INSERT_SQL[lottery_type], _to_insert_row(record))
+            self._bump_version("write_version")
+            logger.info(f"保存{lottery_type}数据成功: {record[0]}")
+            return True
                 
         except Exception as e:
-            logger.error(f"保存双色球数据失败: {e}")
+            logger.error(f"保存{lottery_type}数据失败: {e}")
+            if self._in_batch():
+                raise
             return False
     
-    def save_3d_result(self, period: str, draw_date: str, numbers: List[str],
-                      sales_amount: Optional[str] = None) -> bool:
-        """保存福彩3D开奖结果"""
+    def save_results_bulk(self, lottery_type: str, records: Iterable[Tuple]) -> int:
+        """
+        批量保存开奖结果（单个事务）
+        
+        Args:
+            lottery_type: 彩票类型
+            records: 按 _RESULT_TABLES 中查询列顺序排列的元组序列，可为生成器（逐行消费，不整体驻留内存）
+            
+        Returns:
+            int: 保存的记录数，失败返回0
+        """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    INSERT OR REPLACE INTO fucai3d_results 
-                    (period, draw_date, numbers, sales_amount, updated_at)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (
-                    period, draw_date, json.dumps(numbers),
-                    sales_amount, datetime.now().isoformat()
-                ))
-                
-                conn.commit()
-                logger.info(f"保存福彩3D数据成功: {period}")
-                return True
+            rows = (_to_insert_row(record) for record in records)
+            with self._writer() as conn:
+                saved = conn.executemany(_INSERT_SQL[lottery_type], rows).rowcount
+            self._bump_version("write_version")
+            logger.info(f"批量保存{lottery_type}数据成功: {saved}期")
+            return saved
                 
         except Exception as e:
-            logger.error(f"保存福彩3D数据失败: {e}")
-            return False
+            logger.error(f"批量保存{lottery_type}数据失败: {e}")
+            if self._in_batch():
+                raise
+            return 0
+    
+    def save_ssq_result(self, period: str, draw_date: str, red_balls: List[str], 
+                       blue_ball: str, prize_pool: Optional[str] = None, 
+                       sales_amount: Optional[str] = None) -> bool:
+        """保存双色球开奖结果"""
+        return self.save_result("双色球", (period, draw_date, red_balls, blue_ball, prize_pool, sales_amount))
+    
+    def save_3d_result(self, period: str, draw_date: str, numbers: List[str],
+                      sales_amount: Optional[str] = None) -> bool:
+        """保存福彩3D开奖结果"""
+        return self.save_result("福彩3D", (period, draw_date, numbers, sales_amount))
     
     def save_qlc_result(self, period: str, draw_date: str, basic_numbers: List[str],
                        special_number: str, prize_pool: Optional[str] = None,
                        sales_amount: Optional[str] = None) -> bool:
         """保存七乐彩开奖结果"""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    INSERT OR REPLACE INTO qilecai_results 
-                    (period, draw_date, basic_numbers, special_number, prize_pool, sales_amount, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    period, draw_date, json.dumps(basic_numbers), special_number,
-                    prize_pool, sales_amount, datetime.now().isoformat()
-                ))
-                
-                conn.commit()
-                logger.info(f"保存七乐彩数据成功: {period}")
-                return True
-                
-        except Exception as e:
-            logger.error(f"保存七乐彩数据失败: {e}")
-            return False
+        return self.save_result("七乐彩", (period, draw_date, basic_numbers, special_number, prize_pool, sales_amount))
     
-    def save_kl8_result(self, period: str, draw_date: str, numbers: List[str],
+    def save_kl8_result(self, period: str, draw_date: str, numbers: Union[List[str], str],
                        prize_pool: Optional[str] = None, sales_amount: Optional[str] = None) -> bool:
         """保存快乐8开奖结果"""
+        return self.save_result("快乐8", (period, draw_date, numbers, prize_pool, sales_amount))
+    
+    def save_ssq_results_bulk(self, records: Iterable[Tuple]) -> int:
+        """批量保存双色球开奖结果，records 为 (period, draw_date, red_balls, blue_ball, prize_pool, sales_amount) 元组列表"""
+        return self.save_results_bulk("双色球", records)
+    
+    def save_3d_results_bulk(self, records: Iterable[Tuple]) -> int:
+        """批量保存福彩3D开奖结果，records 为 (period, draw_date, numbers, sales_amount) 元组列表"""
+        return self.save_results_bulk("福彩3D", records)
+    
+    def save_qlc_results_bulk(self, records: Iterable[Tuple]) -> int:
+        """批量保存七乐彩开奖结果，records 为 (period, draw_date, basic_numbers, special_number, prize_pool, sales_amount) 元组列表"""
+        return self.save_results_bulk("七乐彩", records)
+    
+    def save_kl8_results_bulk(self, records: Iterable[Tuple]) -> int:
+        """批量保存快乐8开奖结果，records 为 (period, draw_date, numbers, prize_pool, sales_amount) 元组列表"""
+        return self.save_results_bulk("快乐8", records)
+    
+    def _fetch_results(self, lottery_type: str, limit: int) -> List[Dict[str, Any]]:
+        """按期号倒序查询开奖结果，号码列解码为列表"""
+        sql, row_factory = _RESULT_QUERIES[lottery_type]
+        with self._reader() as conn:
+            cursor = conn.cursor()
+            cursor.row_factory = row_factory
+            return cursor.execute(sql, (limit,)).fetchall()
+    
+    def get_latest(self, lottery_type: str) -> Optional[Dict[str, Any]]:
+        """获取指定彩票类型的最新开奖结果"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    INSERT OR REPLACE INTO kuaile8_results 
-                    (period, draw_date, numbers, prize_pool, sales_amount, updated_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, (
-                    period, draw_date, json.dumps(numbers),
-                    prize_pool, sales_amount, datetime.now().isoformat()
-                ))
-                
-                conn.commit()
-                logger.info(f"保存快乐8数据成功: {period}")
-                return True
+            results = self._fetch_results(lottery_type, 1)
+            return results[0] if results else None
                 
         except Exception as e:
-            logger.error(f"保存快乐8数据失败: {e}")
-            return False
+            logger.error(f"获取最新{lottery_type}数据失败: {e}")
+            return None
     
     def get_latest_ssq(self) -> Optional[Dict[str, Any]]:
         """获取最新双色球开奖结果"""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    SELECT period, draw_date, red_balls, blue_ball, prize_pool, sales_amount
-                    FROM ssq_results 
-                    ORDER BY period DESC 
-                    LIMIT 1
-                """)
-                
-                result = cursor.fetchone()
-                if result:
-                    return {
-                        'period': result[0],
-                        'draw_date': result[1],
-                        'red_balls': json.loads(result[2]),
-                        'blue_ball': result[3],
-                        'prize_pool': result[4],
-                        'sales_amount': result[5]
-                    }
-                return None
-                
-        except Exception as e:
-            logger.error(f"获取最新双色球数据失败: {e}")
-            return None
+        return self.get_latest("双色球")
     
     def get_latest_3d(self) -> Optional[Dict[str, Any]]:
         """获取最新福彩3D开奖结果"""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    SELECT period, draw_date, numbers, sales_amount
-                    FROM fucai3d_results 
-                    ORDER BY period DESC 
-                    LIMIT 1
-                """)
-                
-                result = cursor.fetchone()
-                if result:
-                    return {
-                        'period': result[0],
-                        'draw_date': result[1],
-                        'numbers': json.loads(result[2]),
-                        'sales_amount': result[3]
-                    }
-                return None
-                
-        except Exception as e:
-            logger.error(f"获取最新福彩3D数据失败: {e}")
-            return None
+        return self.get_latest("福彩3D")
     
     def get_latest_qlc(self) -> Optional[Dict[str, Any]]:
         """获取最新七乐彩开奖结果"""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    SELECT period, draw_date, basic_numbers, special_number, prize_pool, sales_amount
-                    FROM qilecai_results 
-                    ORDER BY period DESC 
-                    LIMIT 1
-                """)
-                
-                result = cursor.fetchone()
-                if result:
-                    return {
-                        'period': result[0],
-                        'draw_date': result[1],
-                        'basic_numbers': json.loads(result[2]),
-                        'special_number': result[3],
-                        'prize_pool': result[4],
-                        'sales_amount': result[5]
-                    }
-                return None
-                
-        except Exception as e:
-            logger.error(f"获取最新七乐彩数据失败: {e}")
-            return None
+        return self.get_latest("七乐彩")
     
     def get_latest_kl8(self) -> Optional[Dict[str, Any]]:
         """获取最新快乐8开奖结果"""
-        try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    SELECT period, draw_date, numbers, prize_pool, sales_amount
-                    FROM kuaile8_results 
-                    ORDER BY period DESC 
-                    LIMIT 1
-                """)
-                
-                result = cursor.fetchone()
-                if result:
-                    return {
-                        'period': result[0],
-                        'draw_date': result[1],
-                        'numbers': json.loads(result[2]),
-                        'prize_pool': result[3],
-                        'sales_amount': result[4]
-                    }
-                return None
-                
-        except Exception as e:
-            logger.error(f"获取最新快乐8数据失败: {e}")
-            return None
+        return self.get_latest("快乐8")
     
     def get_historical_data(self, lottery_type: str, limit: int = 10) -> List[Dict[str, Any]]:
         """获取历史开奖数据"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                if lottery_type == "双色球":
-                    cursor.execute("""
-                        SELECT period, draw_date, red_balls, blue_ball, prize_pool, sales_amount
-                        FROM ssq_results 
-                        ORDER BY period DESC 
-                        LIMIT ?
-                    """, (limit,))
-                    
-                    results = []
-                    for row in cursor.fetchall():
-                        results.append({
-                            'period': row[0],
-                            'draw_date': row[1],
-                            'red_balls': json.loads(row[2]),
-                            'blue_ball': row[3],
-                            'prize_pool': row[4],
-                            'sales_amount': row[5]
-                        })
-                    return results
-                    
-                elif lottery_type == "福彩3D":
-                    cursor.execute("""
-                        SELECT period, draw_date, numbers, sales_amount
-                        FROM fucai3d_results 
-                        ORDER BY period DESC 
-                        LIMIT ?
-                    """, (limit,))
-                    
-                    results = []
-                    for row in cursor.fetchall():
-                        results.append({
-                            'period': row[0],
-                            'draw_date': row[1],
-                            'numbers': json.loads(row[2]),
-                            'sales_amount': row[3]
-                        })
-                    return results
-                    
-                elif lottery_type == "七乐彩":
-                    cursor.execute("""
-                        SELECT period, draw_date, basic_numbers, special_number, prize_pool, sales_amount
-                        FROM qilecai_results 
-                        ORDER BY period DESC 
-                        LIMIT ?
-                    """, (limit,))
-                    
-                    results = []
-                    for row in cursor.fetchall():
-                        results.append({
-                            'period': row[0],
-                            'draw_date': row[1],
-                            'basic_numbers': json.loads(row[2]),
-                            'special_number': row[3],
-                            'prize_pool': row[4],
-                            'sales_amount': row[5]
-                        })
-                    return results
-                    
-                elif lottery_type == "快乐8":
-                    cursor.execute("""
-                        SELECT period, draw_date, numbers, prize_pool, sales_amount
-                        FROM kuaile8_results 
-                        ORDER BY period DESC 
-                        LIMIT ?
-                    """, (limit,))
-                    
-                    results = []
-                    for row in cursor.fetchall():
-                        results.append({
-                            'period': row[0],
-                            'draw_date': row[1],
-                            'numbers': json.loads(row[2]),
-                            'prize_pool': row[3],
-                            'sales_amount': row[4]
-                        })
-                    return results
-                    
+            if lottery_type not in _RESULT_QUERIES:
                 return []
+            return self._fetch_results(lottery_type, limit)
                 
         except Exception as e:
             logger.error(f"获取历史数据失败: {e}")
@@ -457,31 +517,35 @@ class LotteryDatabase:
     def update_number_statistics(self, lottery_type: str, numbers: List[str]):
         """更新号码统计信息"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._writer() as conn:
                 cursor = conn.cursor()
                 current_date = datetime.now().isoformat()
                 
-                for number in numbers:
-                    cursor.execute("""
-                        INSERT OR REPLACE INTO number_statistics 
-                        (lottery_type, number, frequency, last_appearance, updated_at)
-                        VALUES (
-                            ?, ?, 
-                            COALESCE((SELECT frequency + 1 FROM number_statistics 
-                                     WHERE lottery_type = ? AND number = ?), 1),
-                            ?, ?
-                        )
-                    """, (lottery_type, number, lottery_type, number, current_date, current_date))
-                
-                conn.commit()
+                # 原生 UPSERT：已存在则频次+1，同一语句只编译一次、逐行绑定参数
+                cursor.executemany(
+                    _UPSERT_NUMBER_STAT_SQL,
+                    [(lottery_type, number, current_date) for number in numbers]
+                )
                 
         except Exception as e:
             logger.error(f"更新号码统计失败: {e}")
+            if self._in_batch():
+                raise
+    
+    def get_period_summary(self, lottery_type: str) -> Tuple[Optional[str], int]:
+        """获取本地最新期号与记录数，用于判断是否需要同步"""
+        try:
+            with self._reader() as conn:
+                return tuple(conn.execute(_PERIOD_SUMMARY_SQL[lottery_type]).fetchone())
+                
+        except Exception as e:
+            logger.error(f"获取{lottery_type}期号摘要失败: {e}")
+            return None, 0
     
     def get_number_statistics(self, lottery_type: str) -> Dict[str, int]:
         """获取号码统计信息"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._reader() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute("""
@@ -501,7 +565,7 @@ class LotteryDatabase:
                 error_message: Optional[str] = None):
         """记录数据同步日志"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._writer() as conn:
                 cursor = conn.cursor()
                 
                 cursor.execute("""
@@ -509,8 +573,7 @@ class LotteryDatabase:
                     (lottery_type, sync_date, records_count, status, error_message)
                     VALUES (?, ?, ?, ?, ?)
                 """, (lottery_type, datetime.now().isoformat(), records_count, status, error_message))
-                
-                conn.commit()
+            self._bump_version("sync_version")
                 
         except Exception as e:
             logger.error(f"记录同步日志失败: {e}")
@@ -518,17 +581,14 @@ class LotteryDatabase:
     def get_database_info(self) -> Dict[str, Any]:
         """获取数据库统计信息"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._reader() as conn:
                 cursor = conn.cursor()
                 
                 info = {}
                 
                 # 统计各表记录数
-                tables = ['ssq_results', 'fucai3d_results', 'qilecai_results', 'kuaile8_results']
-                for table in tables:
-                    cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                    count = cursor.fetchone()[0]
-                    info[table] = count
+                counts = cursor.execute(_COUNT_RESULTS_SQL).fetchone()
+                info.update(zip(_RESULT_TABLE_NAMES, counts))
                 
                 # 获取最新同步时间
                 cursor.execute("""
@@ -3,14 +3,28 @@
 提供多种预测算法：规则算法、AI算法、混合算法
 """
 
+import asyncio
 import random
 import logging
-from typing import List, Dict, Any, Optional
+import threading
+from collections import Counter
+from itertools import chain
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator, AbstractSet
 from dataclasses import dataclass
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# 预先生成的两位号码字符串，避免每次预测重复格式化
+SSQ_RED_NUMBERS = tuple(f"{i:02d}" for i in range(1, 34))
+SSQ_BLUE_NUMBERS = tuple(f"{i:02d}" for i in range(1, 17))
+
+# 历史频次分析缓存的最大条目数
+ANALYSIS_CACHE_MAX_ENTRIES = 8
+
+# 单策略变体与已有组合重复时的最大扰动次数
+MAX_VARIANT_RETRIES = 5
+
 @dataclass
 class PredictionResult:
     """预测结果"""
@@ -21,113 +35,242 @@ class PredictionResult:
     timestamp: str = ""
     metadata: Dict[str, Any] = None
 
+def _rank_counts(counts: List[int]) -> Tuple[Tuple[int, ...], Tuple[int, ...], Tuple[int, ...]]:
+    """
+    按频次对号码排序，返回 (hot, cold, medium) 三种整数号码顺序
+    
+    counts 为稠密计数表，下标 i 对应号码 i（下标 0 不用）。号码下标天然升序，
+    稳定排序只需按频次作 key，频次相同时保持号码升序（reverse=True 同样保持稳定）；
+    key 均为预先算好的列表的 __getitem__，排序时不逐元素调用 Python 函数。
+    medium 按与平均频次的偏差排序，偏差放大 n 倍后用整数表示，避免浮点除法。
+    """
+    idx = range(1, len(counts))
+    n, total = len(idx), sum(counts)
+    deviation = [abs(c * n - total) for c in counts]
+    return (
+        tuple(sorted(idx, key=counts.__getitem__, reverse=True)),
+        tuple(sorted(idx, key=counts.__getitem__)),
+        tuple(sorted(idx, key=deviation.__getitem__)),
+    )
+
+def _pick_distinct(candidates: Iterable[int], k: int, exclude: AbstractSet[int] = frozenset(), *,
+                   rng: random.Random) -> List[int]:
+    """按候选顺序取 k 个不重复的红球（不足则随机补齐），返回升序列表
+    
+    候选可为任意可迭代对象（如 chain 拼接），取满 k 个即停止，不必物化整段候选列表
+    """
+    res = []
+    seen = set(exclude)
+    for n in candidates:
+        if n in seen:
+            continue
+        res.append(n)
+        seen.add(n)
+        if len(res) >= k:
+            break
+    # 不足则随机补齐
+    if len(res) < k:
+        pool = [x for x in range(1, len(SSQ_RED_NUMBERS) + 1) if x not in seen]
+        rng.shuffle(pool)
+        res.extend(pool[:(k - len(res))])
+    return sorted(res)
+
+# 各策略的基础选号：参数为 _analyze_ssq_history 的结果 (hot, cold, medium, blue_sorted, segments) 与随机数生成器
+def _red_balanced(analysis, rng: random.Random) -> List[int]:
+    hot, cold = analysis[0], analysis[1]
+    return _pick_distinct(chain(hot, cold), 6, rng=rng)
+
+def _red_cold_recovery(analysis, rng: random.Random) -> List[int]:
+    hot, cold, medium = analysis[:3]
+    return _pick_distinct(chain(cold, medium, hot), 6, rng=rng)
+
+def _red_hot_focus(analysis, rng: random.Random) -> List[int]:
+    hot, medium = analysis[0], analysis[2]
+    return _pick_distinct(chain(hot, medium), 6, rng=rng)
+
+def _red_interval_balance(analysis, rng: random.Random) -> List[int]:
+    # 每区间各取2个：1-11,12-22,23-33，优先中频次
+    seg1, seg2, seg3 = analysis[4]
+    r1 = _pick_distinct(seg1, 2, rng=rng)
+    r2 = _pick_distinct(seg2, 2, exclude=set(r1), rng=rng)
+    r3 = _pick_distinct(seg3, 2, exclude={*r1, *r2}, rng=rng)
+    return sorted({*r1, *r2, *r3})
+
+def _skip_consecutive(numbers: Iterable[int]) -> Iterator[int]:
+    """惰性过滤：跳过比上一个保留号码恰好大 1 的号码"""
+    prev = None
+    for n in numbers:
+        if prev is not None and n == prev + 1:
+            continue
+        prev = n
+        yield n
+
+def _red_contrarian(analysis, rng: random.Random) -> List[int]:
+    # 避开最热与连号，偏向冷门与分散；候选惰性生成，取满 6 个即停止
+    cold, medium = analysis[1], analysis[2]
+    return _pick_distinct(_skip_consecutive(chain(cold, medium)), 6, rng=rng)
+
+STRATEGY_NAMES = {
+    'balanced': '热冷均衡型',
+    'cold_recovery': '冷门回补型',
+    'hot_focus': '热门集中型',
+    'interval_balance': '区间平衡型',
+    'contrarian': '反向思维型'
+}
+
+ALL_STRATEGIES = ('balanced', 'cold_recovery', 'hot_focus', 'interval_balance', 'contrarian')
+
+_STRATEGY_DISPATCH = {
+    'balanced': _red_balanced,
+    'cold_recovery': _red_cold_recovery,
+    'hot_focus': _red_hot_focus,
+    'interval_balance': _red_interval_balance,
+    'contrarian': _red_contrarian,
+}
+
 class RuleBasedPredictor:
     """基于规则的预测算法"""
     
-    def predict(self, lottery_type: str, historical_data: List[Dict], count: int = 5, strategy: Optional[str] = None) -> List[PredictionResult]:
-        """基于历史数据的规则预测，支持策略"""
+    def __init__(self, seed: Optional[int] = None):
+        # 每个预测器独立的随机数生成器，不与其它模块共享全局状态，可指定种子复现结果
+        self._rng = random.Random(seed)
+        # 历史频次分析缓存：历史数据指纹 -> (hot, cold, medium, blue_sorted, segments)
+        self._analysis_cache: Dict[Tuple, Tuple[tuple, tuple, tuple, tuple, tuple]] = {}
+        # 预测在工作线程中执行（回测时多个线程并发），缓存的读写与淘汰需加锁
+        self._analysis_lock = threading.Lock()
+    
+    def predict(self, lottery_type: str, historical_data: List[Dict], count: int = 5, strategy: Optional[str] = None,
+                frequencies: Optional[Tuple[Dict[str, int], Dict[str, int]]] = None,
+                rng: Optional[random.Random] = None) -> List[PredictionResult]:
+        """
+        基于历史数据的规则预测，支持策略
+        
+        frequencies 为预先统计好的（红球频次, 蓝球频次），提供时不再遍历 historical_data 统计；
+        rng 为本次预测使用的随机数生成器，默认使用预测器自身的生成器
+        """
+        rng = rng or self._rng
         if lottery_type not in {"ssq", "3d", "qlc", "kl8", "双色球", "福彩3D", "七乐彩", "快乐8"}:
             raise ValueError(f"不支持的彩票类型: {lottery_type}")
         
         # 仅实现双色球策略，其它类型先回退到简单规则
         if lottery_type in ("ssq", "双色球"):
-            return self._predict_ssq_with_strategies(historical_data, strategy, count)
+            return self._predict_ssq_with_strategies(historical_data, strategy, count, rng, frequencies)
         
         # 非双色球回退：简单随机+频率权重
-        return self._predict_fallback(historical_data, count)
+        return self._predict_fallback(historical_data, count, rng)
+    
+    def spawn_rng(self) -> random.Random:
+        """
+        从预测器的随机数生成器派生一个独立的生成器
+        
+        并发预测（如回测各窗口）按固定顺序预先派生各自的生成器，
+        线程调度顺序不影响结果，指定种子时可复现
+        """
+        return random.Random(self._rng.getrandbits(64))
+    
+    def invalidate_cache(self):
+        """清空历史频次分析缓存（历史数据更新后调用）"""
+        with self._analysis_lock:
+            self._analysis_cache.clear()
     
-    def _predict_ssq_with_strategies(self, historical_data: List[Dict], strategy: Optional[str], count: int) -> List[PredictionResult]:
+    def _analyze_ssq_history(self, historical_data: List[Dict],
+                             frequencies: Optional[Tuple[Dict[str, int], Dict[str, int]]] = None) -> Tuple[tuple, tuple, tuple, tuple, tuple]:
+        """
+        统计双色球历史频次，返回 (hot, cold, medium, blue_sorted, segments)
+        
+        红球排序结果均为整数号码（1-33），仅在组装预测结果时格式化为两位字符串；
+        blue_sorted 为按频次降序的蓝球号码字符串；
+        segments 为区间平衡策略的三个候选池（1-11、12-22、23-33），各自按中频次、热门顺序排列
+        
+        结果按历史数据指纹（期数 + 首末期号）缓存；历史每期只更新一次，
+        同一批数据上的多策略/多变体预测无需重复统计
+        """
+        history_key = None
+        if historical_data:
+            first, last = historical_data[0].get('period'), historical_data[-1].get('period')
+            if first is not None and last is not None:
+                history_key = (len(historical_data), first, last)
+        if history_key is not None:
+            with self._analysis_lock:
+                cached = self._analysis_cache.get(history_key)
+            if cached is not None:
+                return cached
+        
         # 计算频次
-        freq: Dict[str, int] = {}
-        blue_freq: Dict[str, int] = {}
-        for d in historical_data:
-            for n in d.get('numbers', []):
-                freq[n] = freq.get(n, 0) + 1
-            for n in (d.get('special_numbers') or []):
-                blue_freq[n] = blue_freq.get(n, 0) + 1
-        # 归一化全集
-        all_red = [f"{i:02d}" for i in range(1, 34)]
-        for n in all_red:
-            freq.setdefault(n, 0)
-        all_blue = [f"{i:02d}" for i in range(1, 17)]
-        for n in all_blue:
-            blue_freq.setdefault(n, 0)
+        if frequencies is not None:
+            freq, blue_freq = frequencies
+        else:
+            # 将所有期的号码展平后一次性交给 Counter，在 C 层完成整段计数
+            freq: Dict[str, int] = Counter(
+                chain.from_iterable(d.get('numbers', []) for d in historical_data)
+            )
+            blue_freq: Dict[str, int] = Counter(
+                chain.from_iterable(d.get('special_numbers') or [] for d in historical_data)
+            )
+        # 归一化全集：按号码下标展开为稠密计数表（下标 i 对应号码 i，下标 0 不用）
+        all_red = SSQ_RED_NUMBERS
+        all_blue = SSQ_BLUE_NUMBERS
+        red_counts = [0] + [freq.get(n, 0) for n in all_red]
+        blue_counts = [0] + [blue_freq.get(n, 0) for n in all_blue]
         
-        hot = sorted(freq.items(), key=lambda x: (-x[1], int(x[0])))
-        cold = sorted(freq.items(), key=lambda x: (x[1], int(x[0])))
-        medium = [k for k, v in sorted(freq.items(), key=lambda x: (abs(x[1] - (sum(freq.values())/len(freq) if freq else 0)), int(x[0])))]
-        blue_sorted = sorted(blue_freq.items(), key=lambda x: (-x[1], int(x[0])))
+        hot, cold, medium = _rank_counts(red_counts)
+        blue_sorted = tuple(
+            all_blue[i - 1] for i in sorted(range(1, len(blue_counts)), key=blue_counts.__getitem__, reverse=True)
+        )
         
-        def pick_distinct(candidates: List[str], k: int, exclude: Optional[set] = None) -> List[str]:
-            res = []
-            seen = set(exclude or set())
-            for n in candidates:
-                if n in seen:
-                    continue
-                res.append(n)
-                seen.add(n)
-                if len(res) >= k:
-                    break
-            # 不足则随机补齐
-            if len(res) < k:
-                pool = [x for x in all_red if x not in seen]
-                random.shuffle(pool)
-                res.extend(pool[:(k - len(res))])
-            return sorted(res, key=lambda x: int(x))
+        # 区间候选池只依赖频次排序，随分析结果一并缓存，各变体直接复用；
+        # 对 medium + hot 只扫描一遍，按 (n - 1) // 11 直接落入三个区间桶
+        buckets: Tuple[List[int], List[int], List[int]] = ([], [], [])
+        for n in chain(medium, hot):
+            buckets[(n - 1) // 11].append(n)
+        segments = tuple(tuple(bucket) for bucket in buckets)
+        
+        analysis = (hot, cold, medium, blue_sorted, segments)
+        if history_key is not None:
+            with self._analysis_lock:
+                if len(self._analysis_cache) >= ANALYSIS_CACHE_MAX_ENTRIES:
+                    # 淘汰最早写入的一项
+                    self._analysis_cache.pop(next(iter(self._analysis_cache)), None)
+                self._analysis_cache[history_key] = analysis
+        return analysis
+    
+    def _predict_ssq_with_strategies(self, historical_data: List[Dict], strategy: Optional[str], count: int,
+                                     rng: random.Random,
+                                     frequencies: Optional[Tuple[Dict[str, int], Dict[str, int]]] = None) -> List[PredictionResult]:
+        analysis = self._analyze_ssq_history(historical_data, frequencies)
+        hot, cold, medium, blue_sorted, (seg1, seg2, seg3) = analysis
+        all_red = SSQ_RED_NUMBERS
+        all_blue = SSQ_BLUE_NUMBERS
+        # 同一次预测的各组结果共用一个时间戳
+        now_iso = datetime.now().isoformat()
         
         def blue_pick(top_k: int = 4) -> str:
-            pool = [b for b, _ in blue_sorted[:top_k]] or all_blue
-            return random.choice(pool)
+            pool = blue_sorted[:top_k] or all_blue
+            return rng.choice(pool)
         
-        strategies = {
-            'balanced': '热冷均衡型',
-            'cold_recovery': '冷门回补型',
-            'hot_focus': '热门集中型',
-            'interval_balance': '区间平衡型',
-            'contrarian': '反向思维型'
-        }
+        def perturb(red: List[int]) -> List[int]:
+            # 随机将一个号码换成同区间（1-11/12-22/23-33）内未选中的号码，保持区间分布
+            out = rng.choice(red)
+            low = (out - 1) // 11 * 11 + 1
+            pool = [n for n in range(low, low + 11) if n not in red]
+            return sorted([n for n in red if n != out] + [rng.choice(pool)]) if pool else red
         
         results: List[PredictionResult] = []
-        to_run: List[str]
-        if strategy in (None, '', 'all'):
-            to_run = ['balanced', 'cold_recovery', 'hot_focus', 'interval_balance', 'contrarian']
-        else:
-            to_run = [strategy]
+        # 已生成的红球组合，变体与之重复时扰动重选
+        seen_combos = set()
+        to_run = ALL_STRATEGIES if strategy in (None, '', 'all') else (strategy,)
         
         for strat in to_run:
-            if strat == 'balanced':
-                red = pick_distinct([k for k, _ in hot] + [k for k, _ in cold], 6)
-            elif strat == 'cold_recovery':
-                red = pick_distinct([k for k, _ in cold] + medium + [k for k, _ in hot], 6)
-            elif strat == 'hot_focus':
-                red = pick_distinct([k for k, _ in hot] + medium, 6)
-            elif strat == 'interval_balance':
-                # 每区间各取2个：1-11,12-22,23-33，优先中频次
-                seg1 = [n for n in medium if 1 <= int(n) <= 11] + [k for k, _ in hot if 1 <= int(k) <= 11]
-                seg2 = [n for n in medium if 12 <= int(n) <= 22] + [k for k, _ in hot if 12 <= int(k) <= 22]
-                seg3 = [n for n in medium if 23 <= int(n) <= 33] + [k for k, _ in hot if 23 <= int(k) <= 33]
-                r1 = pick_distinct(seg1, 2)
-                r2 = pick_distinct(seg2, 2, exclude=set(r1))
-                r3 = pick_distinct(seg3, 2, exclude=set(r1 + r2))
-                red = sorted(list(set(r1 + r2 + r3)), key=lambda x: int(x))
-            elif strat == 'contrarian':
-                # 避开最热与连号，偏向冷门与分散
-                base = [k for k, _ in cold] + medium
-                cand = []
-                for n in base:
-                    if cand and int(n) == int(cand[-1]) + 1:
-                        continue
-                    cand.append(n)
-                red = pick_distinct(cand, 6)
-            else:
-                red = pick_distinct([k for k, _ in hot] + [k for k, _ in cold], 6)
+            # 未知策略按热冷均衡处理
+            red = _STRATEGY_DISPATCH.get(strat, _red_balanced)(analysis, rng)
+            seen_combos.add(frozenset(red))
             blue = blue_pick()
             results.append(PredictionResult(
-                numbers=red,
+                numbers=[all_red[n - 1] for n in red],
                 special_numbers=[blue],
                 confidence=0.0,
-                method=strategies.get(strat, strat),
-                timestamp=datetime.now().isoformat(),
+                method=STRATEGY_NAMES.get(strat, strat),
+                timestamp=now_iso,
                 metadata={"strategy": strat}
             ))
         
@@ -141,69 +284,73 @@ class RuleBasedPredictor:
                     hot_ratio = 0.3 + (i * 0.1)  # 0.3, 0.4, 0.5, 0.6, 0.7
                     hot_count = max(1, min(5, int(6 * hot_ratio)))
                     cold_count = 6 - hot_count
-                    red = pick_distinct([k for k, _ in hot][:hot_count*2] + [k for k, _ in cold][:cold_count*2], 6)
+                    red = _pick_distinct(chain(hot[:hot_count*2], cold[:cold_count*2]), 6, rng=rng)
                 elif strategy == 'cold_recovery':
                     # 冷门回补型：调整冷门比例
                     cold_ratio = 0.4 + (i * 0.1)  # 0.4, 0.5, 0.6, 0.7, 0.8
                     cold_count = max(2, min(5, int(6 * cold_ratio)))
                     hot_count = 6 - cold_count
-                    red = pick_distinct([k for k, _ in cold][:cold_count*2] + [k for k, _ in hot][:hot_count*2], 6)
+                    red = _pick_distinct(chain(cold[:cold_count*2], hot[:hot_count*2]), 6, rng=rng)
                 elif strategy == 'hot_focus':
                     # 热门集中型：调整热门比例
                     hot_ratio = 0.5 + (i * 0.1)  # 0.5, 0.6, 0.7, 0.8, 0.9
                     hot_count = max(3, min(6, int(6 * hot_ratio)))
                     cold_count = 6 - hot_count
-                    red = pick_distinct([k for k, _ in hot][:hot_count*2] + [k for k, _ in cold][:cold_count*2], 6)
+                    red = _pick_distinct(chain(hot[:hot_count*2], cold[:cold_count*2]), 6, rng=rng)
                 elif strategy == 'interval_balance':
                     # 区间平衡型：调整各区间的数量
                     seg1_count = 2 + (i % 2)  # 2或3
                     seg2_count = 2 + ((i + 1) % 2)  # 2或3
                     seg3_count = 6 - seg1_count - seg2_count
-                    seg1 = [n for n in medium if 1 <= int(n) <= 11] + [k for k, _ in hot if 1 <= int(k) <= 11]
-                    seg2 = [n for n in medium if 12 <= int(n) <= 22] + [k for k, _ in hot if 12 <= int(k) <= 22]
-                    seg3 = [n for n in medium if 23 <= int(n) <= 33] + [k for k, _ in hot if 23 <= int(k) <= 33]
-                    r1 = pick_distinct(seg1, seg1_count)
-                    r2 = pick_distinct(seg2, seg2_count, exclude=set(r1))
-                    r3 = pick_distinct(seg3, seg3_count, exclude=set(r1 + r2))
-                    red = sorted(list(set(r1 + r2 + r3)), key=lambda x: int(x))
+                    r1 = _pick_distinct(seg1, seg1_count, rng=rng)
+                    r2 = _pick_distinct(seg2, seg2_count, exclude=set(r1), rng=rng)
+                    r3 = _pick_distinct(seg3, seg3_count, exclude={*r1, *r2}, rng=rng)
+                    red = sorted({*r1, *r2, *r3})
                 elif strategy == 'contrarian':
                     # 反向思维型：调整避开热门的程度
                     avoid_hot_ratio = 0.3 + (i * 0.1)  # 0.3, 0.4, 0.5, 0.6, 0.7
                     avoid_count = int(len(hot) * avoid_hot_ratio)
-                    avoid_set = set([k for k, _ in hot[:avoid_count]])
-                    base = [k for k, _ in cold if k not in avoid_set] + [k for k, _ in medium if k not in avoid_set]
-                    red = pick_distinct(base, 6)
+                    avoid_set = set(hot[:avoid_count])
+                    base = chain(cold, medium)
+                    red = _pick_distinct((k for k in base if k not in avoid_set), 6, rng=rng)
                 else:
                     # 默认策略的变体
-                    jitter = [k for k, _ in hot][:10] + [k for k, _ in cold][:10]
-                    random.shuffle(jitter)
-                    red = pick_distinct(jitter, 6)
+                    jitter = [*hot[:10], *cold[:10]]
+                    rng.shuffle(jitter)
+                    red = _pick_distinct(jitter, 6, rng=rng)
+                
+                # 比例取整常使相邻变体得到相同组合：重复时扰动，最多重试若干次后接受
+                for _ in range(MAX_VARIANT_RETRIES):
+                    if frozenset(red) not in seen_combos:
+                        break
+                    red = perturb(red)
+                seen_combos.add(frozenset(red))
                 
                 blue = blue_pick()
                 results.append(PredictionResult(
-                    numbers=red,
+                    numbers=[all_red[n - 1] for n in red],
                     special_numbers=[blue],
                     confidence=0.0,
-                    method=strategies.get(strategy, strategy),
-                    timestamp=datetime.now().isoformat(),
+                    method=STRATEGY_NAMES.get(strategy, strategy),
+                    timestamp=now_iso,
                     metadata={"strategy": strategy, "variant": i + 1}
                 ))
         return results
     
-    def _predict_fallback(self, historical_data: List[Dict], count: int) -> List[PredictionResult]:
-        results: List[PredictionResult] = []
-        for _ in range(count):
-            numbers = sorted(random.sample(range(1, 34), 6))
-            blue = random.randint(1, 16)
-            results.append(PredictionResult(
-                numbers=[f"{n:02d}" for n in numbers],
-                special_numbers=[f"{blue:02d}"],
+    def _predict_fallback(self, historical_data: List[Dict], count: int, rng: random.Random) -> List[PredictionResult]:
+        now_iso = datetime.now().isoformat()
+        # 直接从预格式化的号码表中抽样（两位字符串的字典序即数值序），一次推导生成全部结果
+        return [
+            PredictionResult(
+                numbers=sorted(rng.sample(SSQ_RED_NUMBERS, 6)),
+                special_numbers=[rng.choice(SSQ_BLUE_NUMBERS)],
                 confidence=0.0,
                 method='rule',
-                timestamp=datetime.now().isoformat(),
+                timestamp=now_iso,
                 metadata={"fallback": True}
-            ))
-        return results
+            )
+            for _ in range(count)
+        ]
 
 class PredictionManager:
     """预测管理器"""
@@ -212,11 +359,12 @@ class PredictionManager:
         self.rule_predictor = RuleBasedPredictor()
     
     async def predict(self, lottery_type: str, historical_data: List[Dict], 
-                     method: str = 'rule', count: int = 5, strategy: Optional[str] = None) -> List[PredictionResult]:
+                     method: str = 'rule', count: int = 5, strategy: Optional[str] = None,
+                     frequencies: Optional[Tuple[Dict[str, int], Dict[str, int]]] = None,
+                     rng: Optional[random.Random] = None) -> List[PredictionResult]:
         """执行预测"""
-        try:
-            # 目前仅实现规则+策略
-            return self.rule_predictor.predict(lottery_type, historical_data, count=count, strategy=strategy)
-        except Exception as e:
-            logger.error(f"预测失败: {e}")
-            return self.rule_predictor.predict(lottery_type, historical_data, count=count, strategy=strategy)
+        # 目前仅实现规则+策略；规则计算为纯 CPU 同步代码，放到工作线程执行以免阻塞事件循环
+        return await asyncio.to_thread(
+            self.rule_predictor.predict, lottery_type, historical_data,
+            count=count, strategy=strategy, frequencies=frequencies, rng=rng
+        )
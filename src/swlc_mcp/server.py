@@ -9,19 +9,26 @@ SWLC MCP Server
 - 号码统计功能
 """
 
-import json
 import asyncio
+import importlib.util
 import logging
+import random
+import time
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from dataclasses import dataclass
+from types import MappingProxyType
 import re
+from collections import Counter, OrderedDict
+from heapq import nlargest, nsmallest
+from itertools import chain
+from operator import itemgetter
 
 import httpx
+import orjson
 from mcp import types
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
-from pydantic import BaseModel
 
 # 导入数据库模块
 from .database import LotteryDatabase
@@ -33,6 +40,57 @@ from .backtest import BacktestEngine
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 共享HTTP连接池容量：保持长连接，批量/并发请求复用TCP/TLS连接
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+HTTP_MAX_CONNECTIONS = 100
+# HTTP/2 依赖可选的 h2 包（httpx[http2]），未安装时退回 HTTP/1.1
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+# 网络数据缓存有效期（秒）：开奖每周仅数次，短时间内重复请求直接复用结果
+FETCH_CACHE_TTL = 300
+# 网络请求的最小期数：一次多取若干期，后续最新/少量历史查询直接从缓存切片
+FETCH_PREFETCH_PAGE_SIZE = 50
+# 号码统计结果缓存的最大条目数
+ANALYSIS_CACHE_MAX_ENTRIES = 64
+# analyze_numbers 工具输出文本的缓存有效期（秒）与最大条目数
+ANALYSIS_TEXT_CACHE_TTL = 300
+ANALYSIS_TEXT_CACHE_MAX_ENTRIES = 32
+# analyze_numbers 工具输出的固定文本模板（详细频率行另行拼接在其后）
+_ANALYZE_TEXT_TEMPLATE = (
+    "{lottery_type}号码分析（最近{periods}期）：\n"
+    "\n"
+    "热门号码（前10）：{hot}\n"
+    "冷门号码（后10）：{cold}\n"
+    "\n"
+    "统计信息：\n"
+    "- 分析期数：{total_periods}期\n"
+    "- 最高频号码：{most_num} （出现{most_count}次）\n"
+    "- 最低频号码：{least_num} （出现{least_count}次）\n"
+    "\n"
+    "详细频率统计："
+)
+# 数据库表名 -> 彩票名称（数据库信息输出用）
+_TABLE_LOTTERY_NAMES = MappingProxyType({
+    'ssq_results': '双色球',
+    'fucai3d_results': '福彩3D',
+    'qilecai_results': '七乐彩',
+    'kuaile8_results': '快乐8'
+})
+# 两位号码字符串查找表："00".."80"，生成号码时按下标取用，省去逐个格式化
+_TWO_DIGIT = tuple(f"{num:02d}" for num in range(81))
+
+def _fmt_amount(raw: Optional[str], divisor: int, unit: str, fmt: str = ".2f",
+                parse=int, zero: Optional[str] = None) -> Optional[str]:
+    """将接口返回的金额字符串按单位格式化，无法解析时原样返回"""
+    if not raw:
+        return raw
+    try:
+        amount = parse(raw)
+    except ValueError:
+        return raw
+    if zero is not None and amount == 0:
+        return zero
+    return f"{amount / divisor:{fmt}}{unit}"
+
 # 数据模型
 @dataclass
 class LotteryResult:
@@ -44,22 +102,119 @@ class LotteryResult:
     special_numbers: Optional[List[str]] = None
     prize_pool: Optional[str] = None
     sales_amount: Optional[str] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典（直接构造，避免 dataclasses.asdict 的反射与深拷贝）"""
+        return {
+            "lottery_type": self.lottery_type,
+            "period": self.period,
+            "draw_date": self.draw_date,
+            "numbers": self.numbers,
+            "special_numbers": self.special_numbers,
+            "prize_pool": self.prize_pool,
+            "sales_amount": self.sales_amount
+        }
+    
+    def to_text(self) -> str:
+        """格式化为最新开奖结果的文本"""
+        lines = [
+            f"{self.lottery_type}最新开奖结果：",
+            f"期号：{self.period}",
+            f"开奖日期：{self.draw_date}",
+        ]
+        numbers = ' '.join(self.numbers)
+        special = ' '.join(self.special_numbers or [])
+        if self.lottery_type == "双色球":
+            lines.append(f"开奖号码：{numbers} + {special}")
+        elif self.lottery_type == "七乐彩":
+            lines.append(f"基本号码：{numbers}")
+            lines.append(f"特别号码：{special}")
+        else:
+            lines.append(f"开奖号码：{numbers}")
+        lines.append(f"奖池金额：{self.prize_pool or '暂无'}")
+        # 福彩3D和七乐彩不展示销售金额
+        if self.lottery_type in ("双色球", "快乐8"):
+            lines.append(f"销售金额：{self.sales_amount or '暂无'}")
+        return "\n".join(lines)
+    
+    def to_line(self) -> str:
+        """格式化为单行文本：期号、日期、号码（含特别号码）"""
+        numbers_str = ' '.join(self.numbers)
+        if self.special_numbers:
+            numbers_str = f"{numbers_str} + {' '.join(self.special_numbers)}"
+        return f"期号：{self.period} 日期：{self.draw_date} 号码：{numbers_str}"
 
-class LotteryAnalysis(BaseModel):
-    """彩票分析结果"""
+@dataclass(slots=True)
+class LotteryAnalysis:
+    """彩票分析结果（仅由内部数据构造，无需pydantic校验）"""
     hot_numbers: List[str]
     cold_numbers: List[str]
     frequency_stats: Dict[str, int]
     consecutive_analysis: Dict[str, Any]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典"""
+        return {
+            "hot_numbers": self.hot_numbers,
+            "cold_numbers": self.cold_numbers,
+            "frequency_stats": self.frequency_stats,
+            "consecutive_analysis": self.consecutive_analysis
+        }
+
+@dataclass(frozen=True)
+class _LotterySpec:
+    """彩票类型的解析与存储规格"""
+    numbers_key: str                         # 数据库结果中主号码的键
+    special_key: Optional[str]               # 数据库结果中特别号码的键，无特别号码为None
+    sales_format: Dict[str, Any]             # 销售金额的 _fmt_amount 参数
+    pool_format: Optional[Dict[str, Any]]    # 奖池金额的 _fmt_amount 参数，不记录奖池为None
+    pool_default: str = ''                   # 上游缺少奖池字段时的默认值
+
+_LOTTERY_SPECS: Dict[str, _LotterySpec] = {
+    '双色球': _LotterySpec(
+        numbers_key='red_balls', special_key='blue_ball',
+        sales_format={'divisor': 100000000, 'unit': '亿元'},
+        pool_format={'divisor': 100000000, 'unit': '亿元'},
+    ),
+    '福彩3D': _LotterySpec(
+        numbers_key='numbers', special_key=None,
+        sales_format={'divisor': 10000, 'unit': '万元', 'fmt': '.1f'},
+        pool_format=None,
+    ),
+    '七乐彩': _LotterySpec(
+        numbers_key='basic_numbers', special_key='special_number',
+        sales_format={'divisor': 10000, 'unit': '万元', 'fmt': '.1f'},
+        pool_format={'divisor': 10000, 'unit': '万元', 'zero': '0元'},
+        pool_default='0',
+    ),
+    '快乐8': _LotterySpec(
+        numbers_key='numbers', special_key=None,
+        sales_format={'divisor': 10000, 'unit': '万元', 'fmt': '.1f'},
+        pool_format={'divisor': 10000, 'unit': '万元', 'parse': float},
+    ),
+}
 
 # 彩票数据服务
 class SWLCService:
     """SWLC彩票数据服务"""
     
+    # 彩票类型 -> 接口代码，各实例共享的只读映射
+    lottery_codes = MappingProxyType({
+        '双色球': 'ssq',
+        '福彩3D': '3d',
+        '七乐彩': 'qlc',
+        '快乐8': 'kl8'
+    })
+    
     def __init__(self):
         self.client = httpx.AsyncClient(
             timeout=30.0,
             follow_redirects=True,
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                max_connections=HTTP_MAX_CONNECTIONS,
+            ),
             headers={
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
                 "Referer": "https://www.cwl.gov.cn/",
@@ -67,20 +222,67 @@ class SWLCService:
             },
         )
         self.base_url = 'https://www.cwl.gov.cn/cwl_admin/front/cwlkj/search/kjxx/findDrawNotice'
-        self.lottery_codes = {
-            '双色球': 'ssq',
-            '福彩3D': '3d', 
-            '七乐彩': 'qlc',
-            '快乐8': 'kl8'
-        }
         # 初始化数据库
         self.db = LotteryDatabase()
         # 初始化预测和回测引擎
         self.prediction_manager = PredictionManager()
         self.backtest_engine = BacktestEngine()
+        # 网络数据缓存：彩票类型 -> (获取时间, 请求期数, 数据)
+        self._fetch_cache: Dict[str, Tuple[float, int, dict]] = {}
+        self._fetch_cache_ttl = FETCH_CACHE_TTL
+        # 每个彩票类型一把锁，并发未命中时只发出一次请求
+        self._fetch_locks: Dict[str, asyncio.Lock] = {}
+        # 号码统计缓存：(彩票类型, 期数, 首期, 末期, 数据库写入版本) -> 统计结果
+        self._analysis_cache: Dict[Tuple, LotteryAnalysis] = {}
+    
+    async def aclose(self):
+        """关闭共享的HTTP连接池"""
+        await self.client.aclose()
+    
+    async def _fetch_lottery_data(self, lottery_type: str, page_size: int = 1,
+                                  use_cache: bool = True) -> Optional[dict]:
+        """
+        通用的彩票数据获取方法
+        
+        每次网络请求至少获取 FETCH_PREFETCH_PAGE_SIZE 期并按TTL缓存，
+        期数不超过缓存期数的请求直接从缓存中切片返回。
+        """
+        if not use_cache:
+            data = await self._request_lottery_data(lottery_type, page_size)
+            entry = self._fetch_cache.get(lottery_type)
+            if data and (entry is None or entry[1] <= page_size):
+                # 强制获取的数据最新，期数不少于已缓存数据时顺便刷新缓存
+                self._fetch_cache[lottery_type] = (time.monotonic(), page_size, data)
+            return data
+        
+        cached = self._get_cached_fetch(lottery_type, page_size)
+        if cached is not None:
+            return cached
+        
+        lock = self._fetch_locks.setdefault(lottery_type, asyncio.Lock())
+        async with lock:
+            # 等锁期间可能已由其他请求填充缓存
+            cached = self._get_cached_fetch(lottery_type, page_size)
+            if cached is not None:
+                return cached
+            
+            fetch_size = max(page_size, FETCH_PREFETCH_PAGE_SIZE)
+            data = await self._request_lottery_data(lottery_type, fetch_size)
+            if not data:
+                return None
+            self._fetch_cache[lottery_type] = (time.monotonic(), fetch_size, data)
+            return {**data, 'result': data['result'][:page_size]}
     
-    async def _fetch_lottery_data(self, lottery_type: str, page_size: int = 1) -> Optional[dict]:
-        """通用的彩票数据获取方法"""
+    def _get_cached_fetch(self, lottery_type: str, page_size: int) -> Optional[dict]:
+        """从缓存中取出前 page_size 期数据，缓存过期或期数不足时返回None"""
+        entry = self._fetch_cache.get(lottery_type)
+        if not entry or time.monotonic() - entry[0] >= self._fetch_cache_ttl or entry[1] < page_size:
+            return None
+        data = entry[2]
+        return {**data, 'result': data['result'][:page_size]}
+    
+    async def _request_lottery_data(self, lottery_type: str, page_size: int) -> Optional[dict]:
+        """从网络请求彩票数据"""
         try:
             lottery_code = self.lottery_codes.get(lottery_type)
             if not lottery_code:
@@ -96,7 +298,8 @@ class SWLCService:
             
             response = await self.client.get(self.base_url, params=params)
             if response.status_code == 200:
-                data = response.json()
+                # orjson直接解析响应字节，比httpx内置的json解码快
+                data = orjson.loads(response.content)
                 if data.get('state') == 0 and data.get('result'):
                     return data
             
@@ -176,258 +379,133 @@ class SWLCService:
         
         return False
     
-    async def get_ssq_latest(self) -> Optional[LotteryResult]:
-        """获取双色球最新开奖结果"""
+    def _result_from_db(self, lottery_type: str, row: Dict[str, Any]) -> LotteryResult:
+        """将数据库结果转换为LotteryResult"""
+        spec = _LOTTERY_SPECS[lottery_type]
+        return LotteryResult(
+            lottery_type=lottery_type,
+            period=row['period'],
+            draw_date=row['draw_date'],
+            numbers=row[spec.numbers_key],
+            special_numbers=[row[spec.special_key]] if spec.special_key else None,
+            prize_pool=row.get('prize_pool'),
+            sales_amount=row.get('sales_amount')
+        )
+    
+    def _parse_draw(self, lottery_type: str, item: Dict[str, Any]) -> Tuple[LotteryResult, Tuple, List[str]]:
+        """
+        解析上游接口返回的单期数据
+        
+        Returns:
+            Tuple: (开奖结果, 按数据库列顺序排列的入库记录, 参与号码统计的号码)
+        """
+        spec = _LOTTERY_SPECS[lottery_type]
+        numbers = item['red'].split(',')
+        special_numbers = [item['blue']] if spec.special_key else None
+        pool_money = (_fmt_amount(item.get('poolmoney', spec.pool_default), **spec.pool_format)
+                      if spec.pool_format else None)
+        sales = _fmt_amount(item.get('sales', ''), **spec.sales_format)
+        
+        result = LotteryResult(
+            lottery_type=lottery_type,
+            period=item['code'],
+            draw_date=item['date'],
+            numbers=numbers,
+            special_numbers=special_numbers,
+            prize_pool=pool_money,
+            sales_amount=sales
+        )
+        # 入库记录：(期号, 日期, 号码, [特别号码], [奖池], 销售额)；上游号码已是逗号分隔的存储格式，原样入库
+        record = (item['code'], item['date'], item['red'], *(special_numbers or ()),
+                  *((pool_money,) if spec.pool_format else ()), sales)
+        stat_numbers = numbers + special_numbers if special_numbers else numbers
+        return result, record, stat_numbers
+    
+    def _store_draw(self, lottery_type: str, record: Tuple, stat_numbers: List[str]) -> bool:
+        """在同一事务中保存单期开奖结果并更新号码统计"""
+        with self.db.batch():
+            saved = self.db.save_result(lottery_type, record)
+            if saved:
+                self.db.update_number_statistics(lottery_type, stat_numbers)
+        return saved
+    
+    def _store_draws(self, lottery_type: str, records: List[Tuple], stat_numbers: List[List[str]]) -> int:
+        """在同一事务中批量保存开奖结果（executemany），写入成功后再更新号码统计；任一步失败则整体回滚并抛出"""
+        with self.db.batch():
+            saved = self.db.save_results_bulk(lottery_type, records)
+            if saved:
+                for numbers in stat_numbers:
+                    self.db.update_number_statistics(lottery_type, numbers)
+        return saved
+    
+    async def _get_latest(self, lottery_type: str) -> Optional[LotteryResult]:
+        """获取指定彩票类型的最新开奖结果：数据库数据新鲜时直接返回，否则从网络更新"""
         try:
             # 首先尝试从数据库获取
-            db_result = self.db.get_latest_ssq()
+            db_result = await asyncio.to_thread(self.db.get_latest, lottery_type)
             
-            if self._should_update_from_network(db_result, "双色球"):
-                logger.info("从网络获取双色球数据")
-                data = await self._fetch_lottery_data('双色球')
-                if data and data['result']:
-                    result_data = data['result'][0]
-                    
-                    # 解析红球和蓝球
-                    red_balls = result_data['red'].split(',')
-                    blue_ball = result_data['blue']
-                    
-                    # 格式化奖池金额
-                    pool_money = result_data.get('poolmoney', '')
-                    if pool_money and pool_money.isdigit():
-                        pool_money = f"{int(pool_money) / 100000000:.2f}亿元"
-                    
-                    # 格式化销售金额
-                    sales = result_data.get('sales', '')
-                    if sales and sales.isdigit():
-                        sales = f"{int(sales) / 100000000:.2f}亿元"
-                    
-                    # 保存到数据库
-                    self.db.save_ssq_result(
-                        period=result_data['code'],
-                        draw_date=result_data['date'],
-                        red_balls=red_balls,
-                        blue_ball=blue_ball,
-                        prize_pool=pool_money,
-                        sales_amount=sales
-                    )
-                    
-                    # 更新号码统计
-                    self.db.update_number_statistics('双色球', red_balls + [blue_ball])
-                    
-                    return LotteryResult(
-                        lottery_type="双色球",
-                        period=result_data['code'],
-                        draw_date=result_data['date'],
-                        numbers=red_balls,
-                        special_numbers=[blue_ball],
-                        prize_pool=pool_money,
-                        sales_amount=sales
-                    )
-                else:
-                    # 网络获取失败，如果有数据库数据则返回数据库数据
-                    if db_result:
-                        logger.warning("网络获取双色球数据失败，返回数据库数据")
-                        return LotteryResult(
-                            lottery_type="双色球",
-                            period=db_result['period'],
-                            draw_date=db_result['draw_date'],
-                            numbers=db_result['red_balls'],
-                            special_numbers=[db_result['blue_ball']],
-                            prize_pool=db_result['prize_pool'],
-                            sales_amount=db_result['sales_amount']
-                        )
-                    return None
-            else:
-                logger.info("从本地数据库获取双色球数据")
-                return LotteryResult(
-                    lottery_type="双色球",
-                    period=db_result['period'],
-                    draw_date=db_result['draw_date'],
-                    numbers=db_result['red_balls'],
-                    special_numbers=[db_result['blue_ball']],
-                    prize_pool=db_result['prize_pool'],
-                    sales_amount=db_result['sales_amount']
-                )
+            if not self._should_update_from_network(db_result, lottery_type):
+                logger.info(f"从本地数据库获取{lottery_type}数据")
+                return self._result_from_db(lottery_type, db_result)
+            
+            logger.info(f"从网络获取{lottery_type}数据")
+            data = await self._fetch_lottery_data(lottery_type)
+            if data and data['result']:
+                result, record, stat_numbers = self._parse_draw(lottery_type, data['result'][0])
+                # 保存到数据库并更新号码统计（在工作线程中执行，不阻塞事件循环）
+                try:
+                    await asyncio.to_thread(self._store_draw, lottery_type, record, stat_numbers)
+                except Exception as e:
+                    # 写入失败时事务已整体回滚，网络结果仍可直接返回
+                    logger.error(f"保存{lottery_type}数据失败: {e}")
+                return result
+            
+            # 网络获取失败，如果有数据库数据则返回数据库数据
+            if db_result:
+                logger.warning(f"网络获取{lottery_type}数据失败，返回数据库数据")
+                return self._result_from_db(lottery_type, db_result)
+            return None
         except Exception as e:
-            logger.error(f"获取双色球数据失败: {e}")
+            logger.error(f"获取{lottery_type}数据失败: {e}")
             return None
     
+    async def get_ssq_latest(self) -> Optional[LotteryResult]:
+        """获取双色球最新开奖结果"""
+        return await self._get_latest('双色球')
+    
     async def get_3d_latest(self) -> Optional[LotteryResult]:
         """获取福彩3D最新开奖结果"""
-        try:
-            # 首先尝试从数据库获取
-            db_result = self.db.get_latest_3d()
-            
-            if self._should_update_from_network(db_result, "福彩3D"):
-                logger.info("从网络获取福彩3D数据")
-                data = await self._fetch_lottery_data('福彩3D')
-                if data and data['result']:
-                    result_data = data['result'][0]
-                    
-                    # 解析3D号码 (格式: "2,5,5")
-                    numbers = result_data['red'].split(',')
-                    
-                    # 格式化销售金额
-                    sales = result_data.get('sales', '')
-                    if sales and sales.isdigit():
-                        sales = f"{int(sales) / 10000:.1f}万元"
-                    
-                    # 保存到数据库
-                    self.db.save_3d_result(
-                        period=result_data['code'],
-                        draw_date=result_data['date'],
-                        numbers=numbers,
-                        sales_amount=sales
-                    )
-                    
-                    # 更新号码统计
-                    self.db.update_number_statistics('福彩3D', numbers)
-                    
-                    return LotteryResult(
-                        lottery_type="福彩3D",
-                        period=result_data['code'],
-                        draw_date=result_data['date'],
-                        numbers=numbers,
-                        sales_amount=sales
-                    )
-            else:
-                logger.info("从本地数据库获取福彩3D数据")
-                return LotteryResult(
-                    lottery_type="福彩3D",
-                    period=db_result['period'],
-                    draw_date=db_result['draw_date'],
-                    numbers=db_result['numbers'],
-                    sales_amount=db_result['sales_amount']
-                )
-        except Exception as e:
-            logger.error(f"获取福彩3D数据失败: {e}")
-            return None
+        return await self._get_latest('福彩3D')
     
     async def get_qlc_latest(self) -> Optional[LotteryResult]:
         """获取七乐彩最新开奖结果"""
-        try:
-            # 首先尝试从数据库获取
-            db_result = self.db.get_latest_qlc()
-            
-            if self._should_update_from_network(db_result, "七乐彩"):
-                logger.info("从网络获取七乐彩数据")
-                data = await self._fetch_lottery_data('七乐彩')
-                if data and data['result']:
-                    result_data = data['result'][0]
-                    
-                    # 解析基本号码和特别号码
-                    basic_numbers = result_data['red'].split(',')
-                    special_number = result_data['blue']
-                    
-                    # 格式化奖池金额
-                    pool_money = result_data.get('poolmoney', '0')
-                    if pool_money and pool_money.isdigit():
-                        if int(pool_money) == 0:
-                            pool_money = "0元"
-                        else:
-                            pool_money = f"{int(pool_money) / 10000:.2f}万元"
-                    
-                    # 格式化销售金额
-                    sales = result_data.get('sales', '')
-                    if sales and sales.isdigit():
-                        sales = f"{int(sales) / 10000:.1f}万元"
-                    
-                    # 保存到数据库
-                    self.db.save_qlc_result(
-                        period=result_data['code'],
-                        draw_date=result_data['date'],
-                        basic_numbers=basic_numbers,
-                        special_number=special_number,
-                        prize_pool=pool_money,
-                        sales_amount=sales
-                    )
-                    
-                    # 更新号码统计
-                    self.db.update_number_statistics('七乐彩', basic_numbers + [special_number])
-                    
-                    return LotteryResult(
-                        lottery_type="七乐彩",
-                        period=result_data['code'],
-                        draw_date=result_data['date'],
-                        numbers=basic_numbers,
-                        special_numbers=[special_number],
-                        prize_pool=pool_money,
-                        sales_amount=sales
-                    )
-            else:
-                logger.info("从本地数据库获取七乐彩数据")
-                return LotteryResult(
-                    lottery_type="七乐彩",
-                    period=db_result['period'],
-                    draw_date=db_result['draw_date'],
-                    numbers=db_result['basic_numbers'],
-                    special_numbers=[db_result['special_number']],
-                    prize_pool=db_result['prize_pool'],
-                    sales_amount=db_result['sales_amount']
-                )
-        except Exception as e:
-            logger.error(f"获取七乐彩数据失败: {e}")
-            return None
+        return await self._get_latest('七乐彩')
     
     async def get_kl8_latest(self) -> Optional[LotteryResult]:
         """获取快乐8最新开奖结果"""
-        try:
-            # 首先尝试从数据库获取
-            db_result = self.db.get_latest_kl8()
-            
-            if self._should_update_from_network(db_result, "快乐8"):
-                logger.info("从网络获取快乐8数据")
-                data = await self._fetch_lottery_data('快乐8')
-                if data and data['result']:
-                    result_data = data['result'][0]
-                    
-                    # 解析快乐8号码 (20个号码)
-                    numbers = result_data['red'].split(',')
-                    
-                    # 格式化奖池金额
-                    pool_money = result_data.get('poolmoney', '')
-                    if pool_money and pool_money.replace('.', '').isdigit():
-                        pool_money = f"{float(pool_money) / 10000:.2f}万元"
-                    
-                    # 格式化销售金额
-                    sales = result_data.get('sales', '')
-                    if sales and sales.isdigit():
-                        sales = f"{int(sales) / 10000:.1f}万元"
-                    
-                    # 保存到数据库
-                    self.db.save_kl8_result(
-                        period=result_data['code'],
-                        draw_date=result_data['date'],
-                        numbers=numbers,
-                        prize_pool=pool_money,
-                        sales_amount=sales
-                    )
-                    
-                    # 更新号码统计
-                    self.db.update_number_statistics('快乐8', numbers)
-                    
-                    return LotteryResult(
-                        lottery_type="快乐8",
-                        period=result_data['code'],
-                        draw_date=result_data['date'],
-                        numbers=numbers,
-                        prize_pool=pool_money,
-                        sales_amount=sales
-                    )
-            else:
-                logger.info("从本地数据库获取快乐8数据")
-                return LotteryResult(
-                    lottery_type="快乐8",
-                    period=db_result['period'],
-                    draw_date=db_result['draw_date'],
-                    numbers=db_result['numbers'],
-                    prize_pool=db_result['prize_pool'],
-                    sales_amount=db_result['sales_amount']
-                )
-        except Exception as e:
-            logger.error(f"获取快乐8数据失败: {e}")
-            return None
+        return await self._get_latest('快乐8')
+    
+    async def remote_latest_period(self, lottery_type: str) -> Optional[str]:
+        """获取上游最新一期的期号（绕过TTL缓存直接请求，避免漏掉刚发布的开奖），获取失败返回None"""
+        data = await self._fetch_lottery_data(lottery_type, 1, use_cache=False)
+        if data and data['result']:
+            return data['result'][0]['code']
+        return None
+    
+    async def get_all_latest(self) -> Dict[str, Optional[LotteryResult]]:
+        """并发获取所有彩票类型的最新开奖结果，网络往返时间相互重叠"""
+        results = await asyncio.gather(
+            *(self._get_latest(lottery_type) for lottery_type in _LOTTERY_SPECS),
+            return_exceptions=True
+        )
+        
+        latest = {}
+        for lottery_type, result in zip(_LOTTERY_SPECS, results):
+            if isinstance(result, BaseException):
+                logger.error(f"获取{lottery_type}数据失败: {result}")
+                result = None
+            latest[lottery_type] = result
+        return latest
     
     def _check_period_continuity(self, db_results: List[Dict[str, Any]], lottery_type: str) -> bool:
         """
@@ -490,7 +568,7 @@ class SWLCService:
         """获取历史开奖数据"""
         try:
             # 首先尝试从数据库获取
-            db_results = self.db.get_historical_data(lottery_type, periods)
+            db_results = await asyncio.to_thread(self.db.get_historical_data, lottery_type, periods)
             
             # 检查是否需要从网络更新数据
             should_update = False
@@ -513,49 +591,7 @@ class SWLCService:
             
             if not should_update:
                 logger.info(f"从本地数据库获取{lottery_type}历史数据")
-                results = []
-                for item in db_results:
-                    if lottery_type == "双色球":
-                        result = LotteryResult(
-                            lottery_type="双色球",
-                            period=item['period'],
-                            draw_date=item['draw_date'],
-                            numbers=item['red_balls'],
-                            special_numbers=[item['blue_ball']],
-                            prize_pool=item['prize_pool'],
-                            sales_amount=item['sales_amount']
-                        )
-                    elif lottery_type == "福彩3D":
-                        result = LotteryResult(
-                            lottery_type="福彩3D",
-                            period=item['period'],
-                            draw_date=item['draw_date'],
-                            numbers=item['numbers'],
-                            sales_amount=item['sales_amount']
-                        )
-                    elif lottery_type == "七乐彩":
-                        result = LotteryResult(
-                            lottery_type="七乐彩",
-                            period=item['period'],
-                            draw_date=item['draw_date'],
-                            numbers=item['basic_numbers'],
-                            special_numbers=[item['special_number']],
-                            prize_pool=item['prize_pool'],
-                            sales_amount=item['sales_amount']
-                        )
-                    elif lottery_type == "快乐8":
-                        result = LotteryResult(
-                            lottery_type="快乐8",
-                            period=item['period'],
-                            draw_date=item['draw_date'],
-                            numbers=item['numbers'],
-                            prize_pool=item['prize_pool'],
-                            sales_amount=item['sales_amount']
-                        )
-                    else:
-                        continue
-                    results.append(result)
-                return results
+                return self._convert_db_results_to_lottery_results(db_results, lottery_type)
             
             # 从网络获取并保存数据
             logger.info(f"从网络获取{lottery_type}历史数据")
@@ -567,98 +603,16 @@ class SWLCService:
                     return self._convert_db_results_to_lottery_results(db_results, lottery_type)
                 return []
             
-            results = []
-            for item in data['result']:
-                if lottery_type == "双色球":
-                    # 解析红球和蓝球
-                    red_balls = item['red'].split(',')
-                    blue_ball = item['blue']
-                    
-                    # 保存到数据库
-                    self.db.save_ssq_result(
-                        period=item['code'],
-                        draw_date=item['date'],
-                        red_balls=red_balls,
-                        blue_ball=blue_ball
-                    )
-                    
-                    result = LotteryResult(
-                        lottery_type="双色球",
-                        period=item['code'],
-                        draw_date=item['date'],
-                        numbers=red_balls,
-                        special_numbers=[blue_ball]
-                    )
-                    
-                elif lottery_type == "福彩3D":
-                    # 解析3D号码
-                    numbers = item['red'].split(',')
-                    
-                    # 保存到数据库
-                    self.db.save_3d_result(
-                        period=item['code'],
-                        draw_date=item['date'],
-                        numbers=numbers
-                    )
-                    
-                    result = LotteryResult(
-                        lottery_type="福彩3D",
-                        period=item['code'],
-                        draw_date=item['date'],
-                        numbers=numbers
-                    )
-                    
-                elif lottery_type == "七乐彩":
-                    # 解析基本号码和特别号码
-                    basic_numbers = item['red'].split(',')
-                    special_number = item['blue']
-                    
-                    # 保存到数据库
-                    self.db.save_qlc_result(
-                        period=item['code'],
-                        draw_date=item['date'],
-                        basic_numbers=basic_numbers,
-                        special_number=special_number
-                    )
-                    
-                    result = LotteryResult(
-                        lottery_type="七乐彩",
-                        period=item['code'],
-                        draw_date=item['date'],
-                        numbers=basic_numbers,
-                        special_numbers=[special_number]
-                    )
-                    
-                elif lottery_type == "快乐8":
-                    # 解析快乐8号码
-                    numbers = item['red'].split(',')
-                    
-                    # 保存到数据库
-                    self.db.save_kl8_result(
-                        period=item['code'],
-                        draw_date=item['date'],
-                        numbers=numbers
-                    )
-                    
-                    result = LotteryResult(
-                        lottery_type="快乐8",
-                        period=item['code'],
-                        draw_date=item['date'],
-                        numbers=numbers
-                    )
-                    
-                else:
-                    continue
-                
-                results.append(result)
-            
-            return results
-            
+            parsed = [self._parse_draw(lottery_type, item) for item in data['result']]
+            # 整批写入合并为一个事务，只提交一次
+            await asyncio.to_thread(self.db.save_results_bulk, lottery_type, [record for _, record, _ in parsed])
+            return [result for result, _, _ in parsed]
+        
         except Exception as e:
             logger.error(f"获取{lottery_type}历史数据失败: {e}")
             # 如果出错，尝试返回数据库中的可用数据
             try:
-                db_results = self.db.get_historical_data(lottery_type, periods)
+                db_results = await asyncio.to_thread(self.db.get_historical_data, lottery_type, periods)
                 if db_results:
                     logger.warning(f"返回数据库中的{lottery_type}数据作为备选")
                     return self._convert_db_results_to_lottery_results(db_results, lottery_type)
@@ -668,49 +622,12 @@ class SWLCService:
     
     def _convert_db_results_to_lottery_results(self, db_results: List[Dict[str, Any]], lottery_type: str) -> List[LotteryResult]:
         """将数据库结果转换为LotteryResult对象列表"""
+        if lottery_type not in _LOTTERY_SPECS:
+            return []
         results = []
         for item in db_results:
             try:
-                if lottery_type == "双色球":
-                    result = LotteryResult(
-                        lottery_type="双色球",
-                        period=item['period'],
-                        draw_date=item['draw_date'],
-                        numbers=item['red_balls'],
-                        special_numbers=[item['blue_ball']],
-                        prize_pool=item.get('prize_pool'),
-                        sales_amount=item.get('sales_amount')
-                    )
-                elif lottery_type == "福彩3D":
-                    result = LotteryResult(
-                        lottery_type="福彩3D",
-                        period=item['period'],
-                        draw_date=item['draw_date'],
-                        numbers=item['numbers'],
-                        sales_amount=item.get('sales_amount')
-                    )
-                elif lottery_type == "七乐彩":
-                    result = LotteryResult(
-                        lottery_type="七乐彩",
-                        period=item['period'],
-                        draw_date=item['draw_date'],
-                        numbers=item['basic_numbers'],
-                        special_numbers=[item['special_number']],
-                        prize_pool=item.get('prize_pool'),
-                        sales_amount=item.get('sales_amount')
-                    )
-                elif lottery_type == "快乐8":
-                    result = LotteryResult(
-                        lottery_type="快乐8",
-                        period=item['period'],
-                        draw_date=item['draw_date'],
-                        numbers=item['numbers'],
-                        prize_pool=item.get('prize_pool'),
-                        sales_amount=item.get('sales_amount')
-                    )
-                else:
-                    continue
-                results.append(result)
+                results.append(self._result_from_db(lottery_type, item))
             except Exception as e:
                 logger.warning(f"转换数据库结果失败: {e}")
                 continue
@@ -730,8 +647,8 @@ class SWLCService:
         try:
             logger.info(f"开始强制同步{lottery_type}数据，期数: {periods}")
             
-            # 从网络获取最新数据
-            data = await self._fetch_lottery_data(lottery_type, periods)
+            # 从网络获取最新数据（强制同步不使用缓存）
+            data = await self._fetch_lottery_data(lottery_type, periods, use_cache=False)
             if not data or not data['result']:
                 return {
                     "success": False,
@@ -740,114 +657,20 @@ class SWLCService:
                     "periods": periods
                 }
             
-            # 统计同步的数据
-            synced_count = 0
+            # 逐期解析，解析失败的期跳过
+            records = []
+            stat_numbers = []
             for item in data['result']:
                 try:
-                    if lottery_type == "双色球":
-                        red_balls = item['red'].split(',')
-                        blue_ball = item['blue']
-                        
-                        # 格式化奖池金额
-                        pool_money = item.get('poolmoney', '')
-                        if pool_money and pool_money.isdigit():
-                            pool_money = f"{int(pool_money) / 100000000:.2f}亿元"
-                        
-                        # 格式化销售金额
-                        sales = item.get('sales', '')
-                        if sales and sales.isdigit():
-                            sales = f"{int(sales) / 100000000:.2f}亿元"
-                        
-                        # 保存到数据库
-                        if self.db.save_ssq_result(
-                            period=item['code'],
-                            draw_date=item['date'],
-                            red_balls=red_balls,
-                            blue_ball=blue_ball,
-                            prize_pool=pool_money,
-                            sales_amount=sales
-                        ):
-                            synced_count += 1
-                            # 更新号码统计
-                            self.db.update_number_statistics('双色球', red_balls + [blue_ball])
-                    
-                    elif lottery_type == "福彩3D":
-                        numbers = item['red'].split(',')
-                        
-                        # 格式化销售金额
-                        sales = item.get('sales', '')
-                        if sales and sales.isdigit():
-                            sales = f"{int(sales) / 10000:.1f}万元"
-                        
-                        # 保存到数据库
-                        if self.db.save_3d_result(
-                            period=item['code'],
-                            draw_date=item['date'],
-                            numbers=numbers,
-                            sales_amount=sales
-                        ):
-                            synced_count += 1
-                            # 更新号码统计
-                            self.db.update_number_statistics('福彩3D', numbers)
-                    
-                    elif lottery_type == "七乐彩":
-                        basic_numbers = item['red'].split(',')
-                        special_number = item['blue']
-                        
-                        # 格式化奖池金额
-                        pool_money = item.get('poolmoney', '0')
-                        if pool_money and pool_money.isdigit():
-                            if int(pool_money) == 0:
-                                pool_money = "0元"
-                            else:
-                                pool_money = f"{int(pool_money) / 10000:.2f}万元"
-                        
-                        # 格式化销售金额
-                        sales = item.get('sales', '')
-                        if sales and sales.isdigit():
-                            sales = f"{int(sales) / 10000:.1f}万元"
-                        
-                        # 保存到数据库
-                        if self.db.save_qlc_result(
-                            period=item['code'],
-                            draw_date=item['date'],
-                            basic_numbers=basic_numbers,
-                            special_number=special_number,
-                            prize_pool=pool_money,
-                            sales_amount=sales
-                        ):
-                            synced_count += 1
-                            # 更新号码统计
-                            self.db.update_number_statistics('七乐彩', basic_numbers + [special_number])
-                    
-                    elif lottery_type == "快乐8":
-                        numbers = item['red'].split(',')
-                        
-                        # 格式化奖池金额
-                        pool_money = item.get('poolmoney', '')
-                        if pool_money and pool_money.replace('.', '').isdigit():
-                            pool_money = f"{float(pool_money) / 10000:.2f}万元"
-                        
-                        # 格式化销售金额
-                        sales = item.get('sales', '')
-                        if sales and sales.isdigit():
-                            sales = f"{int(sales) / 10000:.1f}万元"
-                        
-                        # 保存到数据库
-                        if self.db.save_kl8_result(
-                            period=item['code'],
-                            draw_date=item['date'],
-                            numbers=numbers,
-                            prize_pool=pool_money,
-                            sales_amount=sales
-                        ):
-                            synced_count += 1
-                            # 更新号码统计
-                            self.db.update_number_statistics('快乐8', numbers)
-                
+                    _, record, numbers = self._parse_draw(lottery_type, item)
                 except Exception as e:
-                    logger.warning(f"保存{item['code']}期数据失败: {e}")
+                    logger.warning(f"解析{item.get('code')}期数据失败: {e}")
                     continue
+                records.append(record)
+                stat_numbers.append(numbers)
+            
+            # 在工作线程中整批写入，不阻塞事件循环
+            synced_count = await asyncio.to_thread(self._store_draws, lottery_type, records, stat_numbers)
             
             logger.info(f"{lottery_type}数据同步完成，成功同步{synced_count}期")
             return {
@@ -870,36 +693,66 @@ class SWLCService:
     
     def analyze_numbers(self, results: List[LotteryResult]) -> LotteryAnalysis:
         """分析号码统计 - 基于传入的results进行统计，不使用数据库累积统计"""
-        logger.info(f"基于{len(results)}期数据计算号码统计")
+        # 同一窗口且数据库未写入新数据时直接复用上次结果
+        cache_key = None
+        if results:
+            cache_key = (results[0].lottery_type, len(results), results[0].period,
+                         results[-1].period, self.db.write_version)
+            cached = self._analysis_cache.get(cache_key)
+            if cached is not None:
+                return cached
         
-        # 直接从传入的results计算频率统计
-        frequency = {}
-        all_numbers = []
-        
-        for result in results:
-            all_numbers.extend(result.numbers)
-            if result.special_numbers:
-                all_numbers.extend(result.special_numbers)
+        logger.info(f"基于{len(results)}期数据计算号码统计")
         
-        # 统计频率
-        for num in all_numbers:
-            frequency[num] = frequency.get(num, 0) + 1
+        # 直接从传入的results计算频率统计：按开奖顺序串联全部号码，由Counter一次在C层计数
+        counter = Counter(chain.from_iterable(
+            chain(result.numbers, result.special_numbers or ()) for result in results
+        ))
         
-        # 排序找出热号和冷号
-        sorted_nums = sorted(frequency.items(), key=lambda x: x[1], reverse=True)
-        hot_numbers = [num for num, _ in sorted_nums[:10]]
-        cold_numbers = [num for num, _ in sorted_nums[-10:]]
+        # 部分选择找出热号和冷号，无需整体排序；结果与按次数稳定降序排序后取首尾10个一致
+        hot = nlargest(10, counter.items(), key=itemgetter(1))
+        # 冷号取稳定降序的末尾：次数最小者中出现较晚的排在后面
+        cold = nsmallest(10, ((count, -index, num) for index, (num, count) in enumerate(counter.items())))
+        cold = [(num, count) for count, _, num in reversed(cold)]
+        hot_numbers = [num for num, _ in hot]
+        cold_numbers = [num for num, _ in cold]
         
-        return LotteryAnalysis(
+        analysis = LotteryAnalysis(
             hot_numbers=hot_numbers,
             cold_numbers=cold_numbers,
-            frequency_stats=frequency,
+            frequency_stats=dict(counter),
             consecutive_analysis={
                 "total_periods": len(results),
-                "most_frequent": sorted_nums[0] if sorted_nums else ("", 0),
-                "least_frequent": sorted_nums[-1] if sorted_nums else ("", 0)
+                "most_frequent": hot[0] if hot else ("", 0),
+                "least_frequent": cold[-1] if cold else ("", 0)
             }
         )
+        if cache_key is not None:
+            if len(self._analysis_cache) >= ANALYSIS_CACHE_MAX_ENTRIES:
+                # 淘汰最早写入的一项
+                self._analysis_cache.pop(next(iter(self._analysis_cache)), None)
+            self._analysis_cache[cache_key] = analysis
+        return analysis
+    
+    def analyze_consecutive(self, results: List[LotteryResult]) -> Dict[str, Any]:
+        """
+        计算号码统计摘要（与 analyze_numbers 的 consecutive_analysis 一致）
+        
+        只统计频次并线性查找最高/最低频号码，不做排序和热号冷号划分，
+        供只需要摘要信息的调用方使用。
+        """
+        frequency = Counter(
+            num
+            for result in results
+            for num in result.numbers + (result.special_numbers or [])
+        )
+        items = list(frequency.items())
+        return {
+            "total_periods": len(results),
+            # 与按频次稳定降序排序后的首项/末项保持一致
+            "most_frequent": max(items, key=lambda x: x[1]) if items else ("", 0),
+            "least_frequent": min(reversed(items), key=lambda x: x[1]) if items else ("", 0)
+        }
     
     async def analyze_seq_numbers(
         self,
@@ -956,30 +809,26 @@ class SWLCService:
         p_single = numbers_per_draw / pool_size
         theoretical = p_single ** sequence_length
         
-        # 实测：滑窗计数
-        from collections import Counter
-        balls = range(1, pool_size + 1)
+        # 实测：按期顺序一次遍历，维护每个号码截至当期的连出长度；
+        # 连出长度达到 sequence_length 即对应一个命中的滑窗，无需逐窗逐期回看
         total_windows = (num_draws - sequence_length + 1) * pool_size
         hit_count = 0
-        max_run = {}
-        
-        for b in balls:
-            # 滑窗连续
-            for i in range(num_draws - sequence_length + 1):
-                if all(b in rows[i + j] for j in range(sequence_length)):
+        runs = [0] * (pool_size + 1)
+        longest = [0] * (pool_size + 1)
+        for row in rows:
+            next_runs = [0] * (pool_size + 1)
+            for b in set(row):
+                if not 1 <= b <= pool_size:
+                    continue
+                run = next_runs[b] = runs[b] + 1
+                if run > longest[b]:
+                    longest[b] = run
+                if run >= sequence_length:
                     hit_count += 1
-            # 最长连出
-            cur = longest = 0
-            for reds in rows:
-                if b in reds:
-                    cur += 1
-                    longest = max(longest, cur)
-                else:
-                    cur = 0
-            max_run[b] = longest
+            runs = next_runs
         
         empirical = hit_count / total_windows if total_windows else 0
-        max_run_dist = Counter(max_run.values())
+        max_run_dist = Counter(longest[1:])
         
         return {
             "lottery_type": lottery_type,
@@ -998,624 +847,702 @@ class SWLCService:
     
     def generate_random_numbers(self, lottery_type: str) -> Dict[str, Any]:
         """生成随机号码推荐"""
-        import random
-        
+        return self.generate_random_numbers_batch(lottery_type, 1)[0]
+    
+    def generate_random_numbers_batch(self, lottery_type: str, count: int) -> List[Dict[str, Any]]:
+        """批量生成多组随机号码推荐（分支判断与方法查找只做一次，每个号码只格式化一次）"""
+        sample = random.sample
+        groups = []
         if lottery_type == "双色球":
-            red_balls = sorted(random.sample(range(1, 34), 6))
-            blue_ball = random.randint(1, 16)
-            return {
-                "lottery_type": "双色球",
-                "red_balls": [f"{num:02d}" for num in red_balls],
-                "blue_ball": f"{blue_ball:02d}",
-                "format": "红球: " + " ".join([f"{num:02d}" for num in red_balls]) + f" 蓝球: {blue_ball:02d}"
-            }
+            randint = random.randint
+            for _ in range(count):
+                red_balls = [_TWO_DIGIT[num] for num in sorted(sample(range(1, 34), 6))]
+                blue_ball = _TWO_DIGIT[randint(1, 16)]
+                groups.append({
+                    "lottery_type": "双色球",
+                    "red_balls": red_balls,
+                    "blue_ball": blue_ball,
+                    "format": f"红球: {' '.join(red_balls)} 蓝球: {blue_ball}"
+                })
         elif lottery_type == "福彩3D":
-            numbers = [random.randint(0, 9) for _ in range(3)]
-            return {
-                "lottery_type": "福彩3D",
-                "numbers": [str(num) for num in numbers],
-                "format": " ".join([str(num) for num in numbers])
-            }
+            choices = random.choices
+            for _ in range(count):
+                numbers = choices("0123456789", k=3)
+                groups.append({
+                    "lottery_type": "福彩3D",
+                    "numbers": numbers,
+                    "format": " ".join(numbers)
+                })
         elif lottery_type == "七乐彩":
-            basic_balls = sorted(random.sample(range(1, 31), 7))
-            special_ball = random.choice([num for num in range(1, 31) if num not in basic_balls])
-            return {
-                "lottery_type": "七乐彩",
-                "basic_balls": [f"{num:02d}" for num in basic_balls],
-                "special_ball": f"{special_ball:02d}",
-                "format": "基本球: " + " ".join([f"{num:02d}" for num in basic_balls]) + f" 特别号: {special_ball:02d}"
-            }
+            for _ in range(count):
+                # 一次抽取8个不重复号码：前7个为基本号，第8个即为不与基本号重复的特别号
+                *basic, special = sample(range(1, 31), 8)
+                basic_balls = [_TWO_DIGIT[num] for num in sorted(basic)]
+                special_ball = _TWO_DIGIT[special]
+                groups.append({
+                    "lottery_type": "七乐彩",
+                    "basic_balls": basic_balls,
+                    "special_ball": special_ball,
+                    "format": f"基本球: {' '.join(basic_balls)} 特别号: {special_ball}"
+                })
         else:  # 快乐8
-            numbers = sorted(random.sample(range(1, 81), 20))
-            return {
-                "lottery_type": "快乐8",
-                "numbers": [f"{num:02d}" for num in numbers],
-                "format": "号码: " + " ".join([f"{num:02d}" for num in numbers])
-            }
+            for _ in range(count):
+                numbers = [_TWO_DIGIT[num] for num in sorted(sample(range(1, 81), 20))]
+                groups.append({
+                    "lottery_type": "快乐8",
+                    "numbers": numbers,
+                    "format": f"号码: {' '.join(numbers)}"
+                })
+        return groups
+
+# MCP工具列表：内容固定，模块加载时构建一次
+_TOOLS: List[types.Tool] = [
+    types.Tool(
+        name="get_latest_ssq",
+        description="获取双色球最新开奖结果",
+        inputSchema={
+            "type": "object",
+            "properties": {},
+            "required": []
+        }
+    ),
+    types.Tool(
+        name="get_latest_3d",
+        description="获取福彩3D最新开奖结果",
+        inputSchema={
+            "type": "object",
+            "properties": {},
+            "required": []
+        }
+    ),
+    types.Tool(
+        name="get_latest_qlc", 
+        description="获取七乐彩最新开奖结果",
+        inputSchema={
+            "type": "object",
+            "properties": {},
+            "required": []
+        }
+    ),
+    types.Tool(
+        name="get_latest_kl8",
+        description="获取快乐8最新开奖结果",
+        inputSchema={
+            "type": "object",
+            "properties": {},
+            "required": []
+        }
+    ),
+    types.Tool(
+        name="get_all_latest",
+        description="同时获取双色球、福彩3D、七乐彩、快乐8的最新开奖结果",
+        inputSchema={
+            "type": "object",
+            "properties": {},
+            "required": []
+        }
+    ),
+    types.Tool(
+        name="get_historical_data",
+        description="获取指定彩票类型的历史开奖数据",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "lottery_type": {
+                    "type": "string",
+                    "enum": ["双色球", "福彩3D", "七乐彩", "快乐8"],
+                    "description": "彩票类型"
+                },
+                "periods": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": 1000,
+                    "default": 10,
+                    "description": "获取期数"
+                }
+            },
+            "required": ["lottery_type"]
+        }
+    ),
+    types.Tool(
+        name="analyze_numbers",
+        description="分析彩票号码统计信息，包括热号、冷号等",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "lottery_type": {
+                    "type": "string", 
+                    "enum": ["双色球", "福彩3D", "七乐彩", "快乐8"],
+                    "description": "彩票类型"
+                },
+                "periods": {
+                    "type": "integer",
+                    "minimum": 5,
+                    "maximum": 1000,
+                    "default": 30,
+                    "description": "分析期数"
+                }
+            },
+            "required": ["lottery_type"]
+        }
+    ),
+    types.Tool(
+        name="analyze_seq_numbers",
+        description="分析号码连续出现概率（滑窗），返回理论值与实测值",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "lottery_type": {
+                    "type": "string",
+                    "enum": ["双色球", "福彩3D", "七乐彩", "快乐8"],
+                    "description": "彩票类型"
+                },
+                "periods": {
+                    "type": "integer",
+                    "minimum": 5,
+                    "maximum": 1000,
+                    "default": 100,
+                    "description": "分析期数"
+                },
+                "sequence_length": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": 10,
+                    "default": 2,
+                    "description": "连续期数"
+                }
+            },
+            "required": ["lottery_type"]
+        }
+    ),
+    # 暂时屏蔽：号码生成接口
+    # types.Tool(
+    #     name="generate_random_numbers",
+    #     description="生成随机彩票号码推荐",
+    #     inputSchema={
+    #         "type": "object",
+    #         "properties": {
+    #             "lottery_type": {
+    #                 "type": "string",
+    #                 "enum": ["双色球", "福彩3D", "七乐彩", "快乐8"],
+    #                 "description": "彩票类型"
+    #             },
+    #             "count": {
+    #                 "type": "integer",
+    #                 "minimum": 1,
+    #                 "maximum": 10,
+    #                 "default": 1,
+    #                 "description": "生成组数"
+    #             }
+    #         },
+    #         "required": ["lottery_type"]
+    #     }
+    # ),
+    types.Tool(
+        name="sync_lottery_data",
+        description="同步指定彩票类型的最新数据到本地数据库",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "lottery_type": {
+                    "type": "string",
+                    "enum": ["双色球", "福彩3D", "七乐彩", "快乐8"],
+                    "description": "彩票类型"
+                },
+                "periods": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": 50,
+                    "default": 10,
+                    "description": "同步期数"
+                }
+            },
+            "required": ["lottery_type"]
+        }
+    ),
+    types.Tool(
+        name="sync_all_lottery_data",
+        description="同时同步双色球、福彩3D、七乐彩、快乐8的最新数据到本地数据库",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "periods": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": 50,
+                    "default": 10,
+                    "description": "每个彩种的同步期数"
+                }
+            },
+            "required": []
+        }
+    ),
+    types.Tool(
+        name="force_sync_data",
+        description="强制同步指定彩票类型的最新数据到本地数据库",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "lottery_type": {
+                    "type": "string",
+                    "enum": ["双色球", "福彩3D", "七乐彩", "快乐8"],
+                    "description": "彩票类型"
+                },
+                "periods": {
+                    "type": "integer",
+                    "minimum": 1,
+                    "maximum": 1000,
+                    "default": 20,
+                    "description": "同步期数"
+                }
+            },
+            "required": ["lottery_type"]
+        }
+    ),
+    types.Tool(
+        name="get_database_info",
+        description="获取本地数据库统计信息",
+        inputSchema={
+            "type": "object",
+            "properties": {},
+            "required": []
+        }
+    ),
+    # 暂时屏蔽：预测接口
+    # types.Tool(
+    #     name="predict_lottery",
+    #     description="预测彩票号码，基于历史数据生成预测结果",
+    #     inputSchema={
+    #         "type": "object",
+    #         "properties": {
+    #             "lottery_type": {
+    #                 "type": "string",
+    #                 "enum": ["双色球", "福彩3D", "七乐彩", "快乐8"],
+    #                 "description": "彩票类型"
+    #             },
+    #             "method": {
+    #                 "type": "string",
+    #                 "enum": ["rule"],
+    #                 "default": "rule",
+    #                 "description": "预测方法"
+    #             },
+    #             "count": {
+    #                 "type": "integer",
+    #                 "minimum": 1,
+    #                 "maximum": 20,
+    #                 "default": 5,
+    #                 "description": "预测组数"
+    #             },
+    #             "strategy": {
+    #                 "type": "string",
+    #                 "enum": ["all", "balanced", "cold_recovery", "hot_focus", "interval_balance", "contrarian"],
+    #                 "default": "all",
+    #                 "description": "预测策略"
+    #             }
+    #         },
+    #         "required": ["lottery_type"]
+    #     }
+    # ),
+    # 暂时屏蔽：回测接口
+    # types.Tool(
+    #     name="backtest_lottery",
+    #     description="回测预测算法，评估预测准确性",
+    #     inputSchema={
+    #         "type": "object",
+    #         "properties": {
+    #             "lottery_type": {
+    #                 "type": "string",
+    #                 "enum": ["双色球", "福彩3D", "七乐彩", "快乐8"],
+    #                 "description": "彩票类型"
+    #             },
+    #             "window_size": {
+    #                 "type": "integer",
+    #                 "minimum": 50,
+    #                 "maximum": 500,
+    #                 "default": 100,
+    #                 "description": "窗口大小（训练数据期数）"
+    #             },
+    #             "step": {
+    #                 "type": "integer",
+    #                 "minimum": 10,
+    #                 "maximum": 100,
+    #                 "default": 50,
+    #                 "description": "步长（每次移动的期数）"
+    #             }
+    #         },
+    #         "required": ["lottery_type"]
+    #     }
+    # )
+]
 
 # MCP Server实现
-def create_swlc_server() -> Server:
+def create_swlc_server(lottery_service: Optional[SWLCService] = None) -> Server:
     """创建SWLC MCP服务器"""
     server = Server("swlc-mcp")
-    lottery_service = SWLCService()
+    if lottery_service is None:
+        lottery_service = SWLCService()
+    # analyze_numbers 工具的文本缓存（LRU）：(彩票类型, 期数, 数据库写入版本) -> (生成时间, 文本)
+    # 任何途径写入新数据都会改变写入版本，旧条目不再命中，随LRU淘汰
+    analysis_text_cache: "OrderedDict[Tuple[str, int, int], Tuple[float, str]]" = OrderedDict()
+    # get_database_info 工具的文本缓存，数据库写入版本变化时失效
+    db_info_version: Optional[Tuple[int, int]] = None
+    db_info_text: Optional[str] = None
     
     @server.list_tools()
     async def list_tools() -> List[types.Tool]:
         """列出所有可用工具"""
-        return [
-            types.Tool(
-                name="get_latest_ssq",
-                description="获取双色球最新开奖结果",
-                inputSchema={
-                    "type": "object",
-                    "properties": {},
-                    "required": []
-                }
-            ),
-            types.Tool(
-                name="get_latest_3d",
-                description="获取福彩3D最新开奖结果",
-                inputSchema={
-                    "type": "object",
-                    "properties": {},
-                    "required": []
-                }
-            ),
-            types.Tool(
-                name="get_latest_qlc", 
-                description="获取七乐彩最新开奖结果",
-                inputSchema={
-                    "type": "object",
-                    "properties": {},
-                    "required": []
-                }
-            ),
-            types.Tool(
-                name="get_latest_kl8",
-                description="获取快乐8最新开奖结果",
-                inputSchema={
-                    "type": "object",
-                    "properties": {},
-                    "required": []
-                }
-            ),
-            types.Tool(
-                name="get_historical_data",
-                description="获取指定彩票类型的历史开奖数据",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "lottery_type": {
-                            "type": "string",
-                            "enum": ["双色球", "福彩3D", "七乐彩", "快乐8"],
-                            "description": "彩票类型"
-                        },
-                        "periods": {
-                            "type": "integer",
-                            "minimum": 1,
-                            "maximum": 1000,
-                            "default": 10,
-                            "description": "获取期数"
-                        }
-                    },
-                    "required": ["lottery_type"]
-                }
-            ),
-            types.Tool(
-                name="analyze_numbers",
-                description="分析彩票号码统计信息，包括热号、冷号等",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "lottery_type": {
-                            "type": "string", 
-                            "enum": ["双色球", "福彩3D", "七乐彩", "快乐8"],
-                            "description": "彩票类型"
-                        },
-                        "periods": {
-                            "type": "integer",
-                            "minimum": 5,
-                            "maximum": 1000,
-                            "default": 30,
-                            "description": "分析期数"
-                        }
-                    },
-                    "required": ["lottery_type"]
-                }
-            ),
-            types.Tool(
-                name="analyze_seq_numbers",
-                description="分析号码连续出现概率（滑窗），返回理论值与实测值",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "lottery_type": {
-                            "type": "string",
-                            "enum": ["双色球", "福彩3D", "七乐彩", "快乐8"],
-                            "description": "彩票类型"
-                        },
-                        "periods": {
-                            "type": "integer",
-                            "minimum": 5,
-                            "maximum": 1000,
-                            "default": 100,
-                            "description": "分析期数"
-                        },
-                        "sequence_length": {
-                            "type": "integer",
-                            "minimum": 1,
-                            "maximum": 10,
-                            "default": 2,
-                            "description": "连续期数"
-                        }
-                    },
-                    "required": ["lottery_type"]
-                }
-            ),
-            # 暂时屏蔽：号码生成接口
-            # types.Tool(
-            #     name="generate_random_numbers",
-            #     description="生成随机彩票号码推荐",
-            #     inputSchema={
-            #         "type": "object",
-            #         "properties": {
-            #             "lottery_type": {
-            #                 "type": "string",
-            #                 "enum": ["双色球", "福彩3D", "七乐彩", "快乐8"],
-            #                 "description": "彩票类型"
-            #             },
-            #             "count": {
-            #                 "type": "integer",
-            #                 "minimum": 1,
-            #                 "maximum": 10,
-            #                 "default": 1,
-            #                 "description": "生成组数"
-            #             }
-            #         },
-            #         "required": ["lottery_type"]
-            #     }
-            # ),
-            types.Tool(
-                name="sync_lottery_data",
-                description="同步指定彩票类型的最新数据到本地数据库",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "lottery_type": {
-                            "type": "string",
-                            "enum": ["双色球", "福彩3D", "七乐彩", "快乐8"],
-                            "description": "彩票类型"
-                        },
-                        "periods": {
-                            "type": "integer",
-                            "minimum": 1,
-                            "maximum": 50,
-                            "default": 10,
-                            "description": "同步期数"
-                        }
-                    },
-                    "required": ["lottery_type"]
-                }
-            ),
-            types.Tool(
-                name="force_sync_data",
-                description="强制同步指定彩票类型的最新数据到本地数据库",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "lottery_type": {
-                            "type": "string",
-                            "enum": ["双色球", "福彩3D", "七乐彩", "快乐8"],
-                            "description": "彩票类型"
-                        },
-                        "periods": {
-                            "type": "integer",
-                            "minimum": 1,
-                            "maximum": 1000,
-                            "default": 20,
-                            "description": "同步期数"
-                        }
-                    },
-                    "required": ["lottery_type"]
-                }
-            ),
-            types.Tool(
-                name="get_database_info",
-                description="获取本地数据库统计信息",
-                inputSchema={
-                    "type": "object",
-                    "properties": {},
-                    "required": []
-                }
-            ),
-            # 暂时屏蔽：预测接口
-            # types.Tool(
-            #     name="predict_lottery",
-            #     description="预测彩票号码，基于历史数据生成预测结果",
-            #     inputSchema={
-            #         "type": "object",
-            #         "properties": {
-            #             "lottery_type": {
-            #                 "type": "string",
-            #                 "enum": ["双色球", "福彩3D", "七乐彩", "快乐8"],
-            #                 "description": "彩票类型"
-            #             },
-            #             "method": {
-            #                 "type": "string",
-            #                 "enum": ["rule"],
-            #                 "default": "rule",
-            #                 "description": "预测方法"
-            #             },
-            #             "count": {
-            #                 "type": "integer",
-            #                 "minimum": 1,
-            #                 "maximum": 20,
-            #                 "default": 5,
-            #                 "description": "预测组数"
-            #             },
-            #             "strategy": {
-            #                 "type": "string",
-            #                 "enum": ["all", "balanced", "cold_recovery", "hot_focus", "interval_balance", "contrarian"],
-            #                 "default": "all",
-            #                 "description": "预测策略"
-            #             }
-            #         },
-            #         "required": ["lottery_type"]
-            #     }
-            # ),
-            # 暂时屏蔽：回测接口
-            # types.Tool(
-            #     name="backtest_lottery",
-            #     description="回测预测算法，评估预测准确性",
-            #     inputSchema={
-            #         "type": "object",
-            #         "properties": {
-            #             "lottery_type": {
-            #                 "type": "string",
-            #                 "enum": ["双色球", "福彩3D", "七乐彩", "快乐8"],
-            #                 "description": "彩票类型"
-            #             },
-            #             "window_size": {
-            #                 "type": "integer",
-            #                 "minimum": 50,
-            #                 "maximum": 500,
-            #                 "default": 100,
-            #                 "description": "窗口大小（训练数据期数）"
-            #             },
-            #             "step": {
-            #                 "type": "integer",
-            #                 "minimum": 10,
-            #                 "maximum": 100,
-            #                 "default": 50,
-            #                 "description": "步长（每次移动的期数）"
-            #             }
-            #         },
-            #         "required": ["lottery_type"]
-            #     }
-            # )
-        ]
+        return _TOOLS
     
-    @server.call_tool()
-    async def call_tool(name: str, arguments: Dict[str, Any]) -> List[types.TextContent]:
-        """调用工具"""
-        try:
-            if name == "get_latest_ssq":
-                try:
-                    result = await lottery_service.get_ssq_latest()
-                    if result:
-                        return [types.TextContent(
-                            type="text",
-                            text=f"""双色球最新开奖结果：
-期号：{result.period}
-开奖日期：{result.draw_date}
-开奖号码：{' '.join(result.numbers)} + {' '.join(result.special_numbers or [])}
-奖池金额：{result.prize_pool or '暂无'}
-销售金额：{result.sales_amount or '暂无'}"""
-                        )]
-                    else:
-                        # 尝试从数据库获取，即使过期也返回
-                        db_result = lottery_service.db.get_latest_ssq()
-                        if db_result:
-                            return [types.TextContent(
-                                type="text",
-                                text=f"""双色球最新开奖结果（数据库数据）：
-期号：{db_result['period']}
-开奖日期：{db_result['draw_date']}
-开奖号码：{' '.join(db_result['red_balls'])} + {db_result['blue_ball']}
-奖池金额：{db_result.get('prize_pool', '暂无')}
-销售金额：{db_result.get('sales_amount', '暂无')}
-注意：这是数据库中的历史数据，可能不是最新一期"""
-                            )]
-                        return [types.TextContent(type="text", text="获取双色球数据失败：数据库和网络均无可用数据")]
-                except Exception as e:
-                    logger.error(f"MCP调用get_latest_ssq失败: {e}", exc_info=True)
-                    return [types.TextContent(type="text", text=f"获取双色球数据失败：{str(e)}")]
-            
-            elif name == "get_latest_3d":
-                result = await lottery_service.get_3d_latest()
-                if result:
-                    return [types.TextContent(
-                        type="text",
-                        text=f"""福彩3D最新开奖结果：
-期号：{result.period}
-开奖日期：{result.draw_date}
-开奖号码：{' '.join(result.numbers)}
-奖池金额：{result.prize_pool or '暂无'}"""
-                    )]
-                else:
-                    return [types.TextContent(type="text", text="获取福彩3D数据失败")]
-            
-            elif name == "get_latest_qlc":
-                result = await lottery_service.get_qlc_latest()
-                if result:
-                    return [types.TextContent(
-                        type="text", 
-                        text=f"""七乐彩最新开奖结果：
-期号：{result.period}
-开奖日期：{result.draw_date}
-基本号码：{' '.join(result.numbers)}
-特别号码：{' '.join(result.special_numbers or [])}
-奖池金额：{result.prize_pool or '暂无'}"""
-                    )]
-                else:
-                    return [types.TextContent(type="text", text="获取七乐彩数据失败")]
-            
-            elif name == "get_latest_kl8":
-                result = await lottery_service.get_kl8_latest()
-                if result:
-                    return [types.TextContent(
-                        type="text",
-                        text=f"""快乐8最新开奖结果：
-期号：{result.period}
-开奖日期：{result.draw_date}
-开奖号码：{' '.join(result.numbers)}
-奖池金额：{result.prize_pool or '暂无'}
-销售金额：{result.sales_amount or '暂无'}"""
-                    )]
-                else:
-                    return [types.TextContent(type="text", text="获取快乐8数据失败")]
-            
-            elif name == "get_historical_data":
-                lottery_type = arguments.get("lottery_type")
-                periods = arguments.get("periods", 10)
-                
-                results = await lottery_service.get_historical_data(lottery_type, periods)
-                if results:
-                    text_lines = [f"{lottery_type}历史开奖数据（最近{len(results)}期）：\n"]
-                    
-                    for result in results:
-                        if result.special_numbers:
-                            numbers_str = f"{' '.join(result.numbers)} + {' '.join(result.special_numbers)}"
-                        else:
-                            numbers_str = ' '.join(result.numbers)
-                        
-                        text_lines.append(f"期号：{result.period} 日期：{result.draw_date} 号码：{numbers_str}")
-                    
-                    return [types.TextContent(type="text", text="\n".join(text_lines))]
-                else:
-                    return [types.TextContent(type="text", text="获取历史数据失败")]
-            
-            elif name == "analyze_numbers":
-                lottery_type = arguments.get("lottery_type")
-                periods = arguments.get("periods", 30)
-                
-                results = await lottery_service.get_historical_data(lottery_type, periods)
-                if results:
-                    analysis = lottery_service.analyze_numbers(results)
-                    
-                    text = f"""{lottery_type}号码分析（最近{periods}期）：
-
-热门号码（前10）：{' '.join(analysis.hot_numbers)}
-冷门号码（后10）：{' '.join(analysis.cold_numbers)}
-
-统计信息：
-- 分析期数：{analysis.consecutive_analysis['total_periods']}期
-- 最高频号码：{analysis.consecutive_analysis['most_frequent'][0]} （出现{analysis.consecutive_analysis['most_frequent'][1]}次）
-- 最低频号码：{analysis.consecutive_analysis['least_frequent'][0]} （出现{analysis.consecutive_analysis['least_frequent'][1]}次）
-
-详细频率统计："""
-                    
-                    # 添加详细频率信息
-                    sorted_freq = sorted(analysis.frequency_stats.items(), key=lambda x: x[1], reverse=True)
-                    for num, freq in sorted_freq[:15]:  # 显示前15个
-                        text += f"\n号码 {num}: {freq}次"
-                    
-                    return [types.TextContent(type="text", text=text)]
-                else:
-                    return [types.TextContent(type="text", text="获取数据失败，无法进行分析")]
+    async def handle_get_latest_ssq(arguments: Dict[str, Any]) -> List[types.TextContent]:
+        """获取双色球最新开奖结果"""
+        result = await lottery_service.get_ssq_latest()
+        if result:
+            return [types.TextContent(type="text", text=result.to_text())]
+        else:
+            return [types.TextContent(type="text", text="获取双色球数据失败")]
+    
+    async def handle_get_latest_3d(arguments: Dict[str, Any]) -> List[types.TextContent]:
+        """获取福彩3D最新开奖结果"""
+        result = await lottery_service.get_3d_latest()
+        if result:
+            return [types.TextContent(type="text", text=result.to_text())]
+        else:
+            return [types.TextContent(type="text", text="获取福彩3D数据失败")]
+    
+    async def handle_get_latest_qlc(arguments: Dict[str, Any]) -> List[types.TextContent]:
+        """获取七乐彩最新开奖结果"""
+        result = await lottery_service.get_qlc_latest()
+        if result:
+            return [types.TextContent(type="text", text=result.to_text())]
+        else:
+            return [types.TextContent(type="text", text="获取七乐彩数据失败")]
+    
+    async def handle_get_latest_kl8(arguments: Dict[str, Any]) -> List[types.TextContent]:
+        """获取快乐8最新开奖结果"""
+        result = await lottery_service.get_kl8_latest()
+        if result:
+            return [types.TextContent(type="text", text=result.to_text())]
+        else:
+            return [types.TextContent(type="text", text="获取快乐8数据失败")]
+    
+    async def handle_get_all_latest(arguments: Dict[str, Any]) -> List[types.TextContent]:
+        """同时获取双色球、福彩3D、七乐彩、快乐8的最新开奖结果"""
+        latest = await lottery_service.get_all_latest()
+        text_lines = ["各彩种最新开奖结果：\n"]
+        
+        for lottery_type, result in latest.items():
+            if result:
+                text_lines.append(f"{lottery_type} {result.to_line()}")
+            else:
+                text_lines.append(f"{lottery_type}：获取数据失败")
+        
+        return [types.TextContent(type="text", text="\n".join(text_lines))]
+    
+    async def handle_get_historical_data(arguments: Dict[str, Any]) -> List[types.TextContent]:
+        """获取指定彩票类型的历史开奖数据"""
+        lottery_type = arguments.get("lottery_type")
+        periods = arguments.get("periods", 10)
+        
+        results = await lottery_service.get_historical_data(lottery_type, periods)
+        if results:
+            # 表头与各行一次性拼接，避免先生成列表再整体复制一遍
+            header = f"{lottery_type}历史开奖数据（最近{len(results)}期）：\n"
+            text = "\n".join(chain((header,), map(LotteryResult.to_line, results)))
+            return [types.TextContent(type="text", text=text)]
+        else:
+            return [types.TextContent(type="text", text="获取历史数据失败")]
+    
+    async def handle_analyze_numbers(arguments: Dict[str, Any]) -> List[types.TextContent]:
+        """分析彩票号码统计信息，包括热号、冷号等"""
+        lottery_type = arguments.get("lottery_type")
+        periods = arguments.get("periods", 30)
+        
+        # 相同参数、数据库未写入新数据时，在有效期内直接返回上次生成的文本；
+        # 版本在取数前记录，取数期间若有新数据写入，本次文本按旧版本缓存，下次调用即失效
+        cache_key = (lottery_type, periods, lottery_service.db.write_version)
+        entry = analysis_text_cache.get(cache_key)
+        if entry and time.monotonic() - entry[0] < ANALYSIS_TEXT_CACHE_TTL:
+            analysis_text_cache.move_to_end(cache_key)
+            return [types.TextContent(type="text", text=entry[1])]
+        
+        results = await lottery_service.get_historical_data(lottery_type, periods)
+        if results:
+            analysis = lottery_service.analyze_numbers(results)
             
-            elif name == "analyze_seq_numbers":
-                lottery_type = arguments.get("lottery_type")
-                periods = arguments.get("periods", 100)
-                sequence_length = arguments.get("sequence_length", 2)
-                
-                result = await lottery_service.analyze_seq_numbers(
-                    lottery_type=lottery_type,
-                    periods=periods,
-                    sequence_length=sequence_length,
-                )
-                
-                detail = result.get("counts", {})
-                text = (
-                    f"{lottery_type} 连续出现分析（最近{result['periods_used']}期，连续{sequence_length}期）：\n\n"
-                    f"- 理论概率: {result['theoretical_prob']:.8f}\n"
-                    f"- 实测概率: {result['empirical_prob']:.8f}\n"
-                    f"- 计数: {detail.get('hits', 0)} / {detail.get('windows', 0)}\n"
-                    f"- 号码池: {result['pool_size']}，每期开出: {result['numbers_per_draw']}\n"
-                    f"- 最长连出分布: {result.get('max_run_distribution', {})}"
-                )
-                return [types.TextContent(type="text", text=text)]
+            stats = analysis.consecutive_analysis
+            most_num, most_count = stats['most_frequent']
+            least_num, least_count = stats['least_frequent']
+            parts = [_ANALYZE_TEXT_TEMPLATE.format_map({
+                "lottery_type": lottery_type,
+                "periods": periods,
+                "hot": ' '.join(analysis.hot_numbers),
+                "cold": ' '.join(analysis.cold_numbers),
+                "total_periods": stats['total_periods'],
+                "most_num": most_num,
+                "most_count": most_count,
+                "least_num": least_num,
+                "least_count": least_count,
+            })]
             
-            # 暂时屏蔽：号码生成接口
-            # elif name == "generate_random_numbers":
-            #     lottery_type = arguments.get("lottery_type")
-            #     count = arguments.get("count", 1)
-            #     
-            #     results = []
-            #     for i in range(count):
-            #         random_result = lottery_service.generate_random_numbers(lottery_type)
-            #         results.append(f"推荐 {i+1}: {random_result['format']}")
-            #     
-            #     return [types.TextContent(
-            #         type="text",
-            #         text=f"{lottery_type}随机号码推荐：\n\n" + "\n".join(results)
-            #     )]
+            # 添加详细频率信息
+            # 只需前15个，部分选择即可，无需整体排序（结果与稳定降序排序一致）
+            sorted_freq = nlargest(15, analysis.frequency_stats.items(), key=itemgetter(1))
+            parts.extend(f"号码 {num}: {freq}次" for num, freq in sorted_freq)
+            text = "\n".join(parts)
             
-            elif name == "sync_lottery_data":
-                lottery_type = arguments.get("lottery_type")
-                periods = arguments.get("periods", 10)
-                
-                try:
-                    # 从网络获取数据并保存到数据库
-                    results = await lottery_service.get_historical_data(lottery_type, periods)
-                    if results:
-                        # 记录同步日志
-                        lottery_service.db.log_sync(lottery_type, len(results))
-                        return [types.TextContent(
-                            type="text",
-                            text=f"成功同步{lottery_type}数据{len(results)}期到本地数据库"
-                        )]
-                    else:
-                        lottery_service.db.log_sync(lottery_type, 0, 'failed', '获取数据失败')
-                        return [types.TextContent(type="text", text=f"同步{lottery_type}数据失败")]
-                except Exception as e:
-                    lottery_service.db.log_sync(lottery_type, 0, 'failed', str(e))
-                    return [types.TextContent(type="text", text=f"同步{lottery_type}数据失败：{str(e)}")]
+            analysis_text_cache[cache_key] = (time.monotonic(), text)
+            analysis_text_cache.move_to_end(cache_key)
+            if len(analysis_text_cache) > ANALYSIS_TEXT_CACHE_MAX_ENTRIES:
+                analysis_text_cache.popitem(last=False)
+            return [types.TextContent(type="text", text=text)]
+        else:
+            return [types.TextContent(type="text", text="获取数据失败，无法进行分析")]
+    
+    async def handle_analyze_seq_numbers(arguments: Dict[str, Any]) -> List[types.TextContent]:
+        """分析号码连续出现概率（滑窗），返回理论值与实测值"""
+        lottery_type = arguments.get("lottery_type")
+        periods = arguments.get("periods", 100)
+        sequence_length = arguments.get("sequence_length", 2)
+        
+        result = await lottery_service.analyze_seq_numbers(
+            lottery_type=lottery_type,
+            periods=periods,
+            sequence_length=sequence_length,
+        )
+        
+        detail = result.get("counts", {})
+        text = (
+            f"{lottery_type} 连续出现分析（最近{result['periods_used']}期，连续{sequence_length}期）：\n\n"
+            f"- 理论概率: {result['theoretical_prob']:.8f}\n"
+            f"- 实测概率: {result['empirical_prob']:.8f}\n"
+            f"- 计数: {detail.get('hits', 0)} / {detail.get('windows', 0)}\n"
+            f"- 号码池: {result['pool_size']}，每期开出: {result['numbers_per_draw']}\n"
+            f"- 最长连出分布: {result.get('max_run_distribution', {})}"
+        )
+        return [types.TextContent(type="text", text=text)]
+    
+    # 暂时屏蔽：号码生成接口
+    # async def handle_generate_random_numbers(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    #     """生成随机彩票号码推荐"""
+    #     lottery_type = arguments.get("lottery_type")
+    #     count = arguments.get("count", 1)
+    #     
+    #     batch = lottery_service.generate_random_numbers_batch(lottery_type, count)
+    #     results = [f"推荐 {i}: {item['format']}" for i, item in enumerate(batch, 1)]
+    #     
+    #     return [types.TextContent(
+    #         type="text",
+    #         text=f"{lottery_type}随机号码推荐：\n\n" + "\n".join(results)
+    #     )]
+    
+    async def sync_one(lottery_type: str, periods: int) -> str:
+        """同步单个彩票类型并记录同步日志，返回结果说明文本"""
+        db = lottery_service.db
+        try:
+            # 本地已有足够期数且最新期号与上游一致时无需同步
+            latest_period, count = await asyncio.to_thread(db.get_period_summary, lottery_type)
+            if latest_period and count >= periods:
+                remote_period = await lottery_service.remote_latest_period(lottery_type)
+                if remote_period == latest_period:
+                    # 未发生实际同步，不记录同步日志
+                    return f"{lottery_type}数据已是最新（第{latest_period}期），无需同步"
             
-            elif name == "force_sync_data":
-                lottery_type = arguments.get("lottery_type")
-                periods = arguments.get("periods", 20)
-                
-                try:
-                    sync_result = await lottery_service.force_sync_data(lottery_type, periods)
-                    if sync_result["success"]:
-                        return [types.TextContent(
-                            type="text",
-                            text=f"成功强制同步{sync_result['lottery_type']}数据{sync_result['synced_count']}期到本地数据库"
-                        )]
-                    else:
-                        return [types.TextContent(
-                            type="text",
-                            text=f"强制同步{sync_result['lottery_type']}数据失败: {sync_result['message']}"
-                        )]
-                except Exception as e:
-                    return [types.TextContent(type="text", text=f"强制同步{lottery_type}数据失败：{str(e)}")]
+            # 从网络获取数据并保存到数据库
+            results = await lottery_service.get_historical_data(lottery_type, periods)
+            if results:
+                # 记录同步日志
+                await asyncio.to_thread(db.log_sync, lottery_type, len(results))
+                return f"成功同步{lottery_type}数据{len(results)}期到本地数据库"
+            else:
+                await asyncio.to_thread(db.log_sync, lottery_type, 0, 'failed', '获取数据失败')
+                return f"同步{lottery_type}数据失败"
+        except Exception as e:
+            await asyncio.to_thread(db.log_sync, lottery_type, 0, 'failed', str(e))
+            return f"同步{lottery_type}数据失败：{str(e)}"
+    
+    async def handle_sync_lottery_data(arguments: Dict[str, Any]) -> List[types.TextContent]:
+        """同步指定彩票类型的最新数据到本地数据库"""
+        lottery_type = arguments.get("lottery_type")
+        periods = arguments.get("periods", 10)
+        
+        text = await sync_one(lottery_type, periods)
+        return [types.TextContent(type="text", text=text)]
+    
+    async def handle_sync_all_lottery_data(arguments: Dict[str, Any]) -> List[types.TextContent]:
+        """同时同步双色球、福彩3D、七乐彩、快乐8的最新数据到本地数据库"""
+        periods = arguments.get("periods", 10)
+        
+        # 各彩种并发同步，总耗时取决于最慢的数据源而非逐个累加
+        texts = await asyncio.gather(
+            *(sync_one(lottery_type, periods) for lottery_type in _LOTTERY_SPECS)
+        )
+        text = "\n".join(chain(("各彩种同步结果：\n",), texts))
+        return [types.TextContent(type="text", text=text)]
+    
+    async def handle_force_sync_data(arguments: Dict[str, Any]) -> List[types.TextContent]:
+        """强制同步指定彩票类型的最新数据到本地数据库"""
+        lottery_type = arguments.get("lottery_type")
+        periods = arguments.get("periods", 20)
+        
+        try:
+            sync_result = await lottery_service.force_sync_data(lottery_type, periods)
+            if sync_result["success"]:
+                return [types.TextContent(
+                    type="text",
+                    text=f"成功强制同步{sync_result['lottery_type']}数据{sync_result['synced_count']}期到本地数据库"
+                )]
+            else:
+                return [types.TextContent(
+                    type="text",
+                    text=f"强制同步{sync_result['lottery_type']}数据失败: {sync_result['message']}"
+                )]
+        except Exception as e:
+            return [types.TextContent(type="text", text=f"强制同步{lottery_type}数据失败：{str(e)}")]
+    
+    async def handle_get_database_info(arguments: Dict[str, Any]) -> List[types.TextContent]:
+        """获取本地数据库统计信息"""
+        nonlocal db_info_version, db_info_text
+        try:
+            # 记录数与同步时间只在写入开奖结果或同步日志后变化
+            db = lottery_service.db
+            version = (db.write_version, db.sync_version)
+            if version == db_info_version:
+                return [types.TextContent(type="text", text=db_info_text)]
             
-            elif name == "get_database_info":
-                try:
-                    info = lottery_service.db.get_database_info()
-                    text_lines = ["本地数据库统计信息：\n"]
-                    
-                    # 各表记录数
-                    text_lines.append("各彩票类型记录数：")
-                    for table, count in info.items():
-                        if table != 'last_sync':
-                            lottery_name = {
-                                'ssq_results': '双色球',
-                                'fucai3d_results': '福彩3D', 
-                                'qilecai_results': '七乐彩',
-                                'kuaile8_results': '快乐8'
-                            }.get(table, table)
-                            text_lines.append(f"- {lottery_name}: {count}期")
-                    
-                    # 最新同步时间
-                    if 'last_sync' in info and info['last_sync']:
-                        text_lines.append("\n最新同步时间：")
-                        for lottery_type, sync_time in info['last_sync'].items():
-                            text_lines.append(f"- {lottery_type}: {sync_time}")
-                    
-                    return [types.TextContent(type="text", text="\n".join(text_lines))]
-                except Exception as e:
-                    return [types.TextContent(type="text", text=f"获取数据库信息失败：{str(e)}")]
+            info = await asyncio.to_thread(db.get_database_info)
+            text_lines = ["本地数据库统计信息：\n"]
             
-            # 暂时屏蔽：预测接口
-            # elif name == "predict_lottery":
-            #     lottery_type = arguments.get("lottery_type")
-            #     method = arguments.get("method", "rule")
-            #     count = arguments.get("count", 5)
-            #     strategy = arguments.get("strategy", "all")
-            #     
-            #     try:
-            #         # 获取历史数据用于预测
-            #         historical_data = await lottery_service.get_historical_data(lottery_type, 120)
-            #         if not historical_data:
-            #             return [types.TextContent(type="text", text=f"获取{lottery_type}历史数据失败，无法进行预测")]
-            #         
-            #         # 转换为字典格式
-            #         history_dict = [{
-            #             'period': r.period,
-            #             'numbers': r.numbers,
-            #             'special_numbers': r.special_numbers,
-            #             'draw_date': r.draw_date
-            #         } for r in historical_data]
-            #         
-            #         # 执行预测
-            #         predictions = await lottery_service.prediction_manager.predict(
-            #             lottery_type, history_dict, method=method, count=count, strategy=strategy
-            #         )
-            #         
-            #         if predictions:
-            #             text_lines = [f"{lottery_type}预测结果（方法：{method}，策略：{strategy}）：\n"]
-            #             for i, pred in enumerate(predictions, 1):
-            #                 if pred.special_numbers:
-            #                     numbers_str = f"{' '.join(pred.numbers)} + {' '.join(pred.special_numbers)}"
-            #                 else:
-            #                     numbers_str = ' '.join(pred.numbers)
-            #                 text_lines.append(f"预测 {i}: {numbers_str} (置信度: {pred.confidence:.2%})")
-            #             
-            #             return [types.TextContent(type="text", text="\n".join(text_lines))]
-            #         else:
-            #             return [types.TextContent(type="text", text=f"{lottery_type}预测失败")]
-            #             
-            #     except Exception as e:
-            #         logger.error(f"预测失败: {e}")
-            #         return [types.TextContent(type="text", text=f"预测失败：{str(e)}")]
+            # 各表记录数
+            text_lines.append("各彩票类型记录数：")
+            for table, count in info.items():
+                if table != 'last_sync':
+                    text_lines.append(f"- {_TABLE_LOTTERY_NAMES.get(table, table)}: {count}期")
             
-            # 暂时屏蔽：回测接口
-            # elif name == "backtest_lottery":
-            #     lottery_type = arguments.get("lottery_type")
-            #     window_size = arguments.get("window_size", 100)
-            #     step = arguments.get("step", 50)
-            #     
-            #     try:
-            #         # 获取历史数据用于回测
-            #         historical_data = await lottery_service.get_historical_data(lottery_type, window_size * 2)
-            #         if len(historical_data) < window_size:
-            #             return [types.TextContent(type="text", text=f"历史数据不足，需要至少{window_size}期数据")]
-            #         
-            #         # 转换为字典格式
-            #         history_dict = [{
-            #             'period': r.period,
-            #             'numbers': r.numbers,
-            #             'special_numbers': r.special_numbers,
-            #             'draw_date': r.draw_date
-            #         } for r in historical_data]
-            #         
-            #         # 执行回测
-            #         backtest_result = await lottery_service.backtest_engine.run_backtest(
-            #             lottery_type, history_dict, window_size=window_size, step=step
-            #         )
-            #         
-            #         text_lines = [
-            #             f"{lottery_type}回测结果：\n",
-            #             f"总回测期数：{backtest_result.total_periods}期",
-            #             f"平均准确率：{backtest_result.average_accuracy:.2%}",
-            #             f"最佳策略：{backtest_result.best_strategy}",
-            #             "\n各策略表现："
-            #         ]
-            #         
-            #         for strategy, performance in backtest_result.strategy_performance.items():
-            #             text_lines.append(f"- {strategy}: 准确率 {performance:.2%}")
-            #         
-            #         return [types.TextContent(type="text", text="\n".join(text_lines))]
-            #         
-            #     except Exception as e:
-            #         logger.error(f"回测失败: {e}")
-            #         return [types.TextContent(type="text", text=f"回测失败：{str(e)}")]
+            # 最新同步时间
+            if 'last_sync' in info and info['last_sync']:
+                text_lines.append("\n最新同步时间：")
+                for lottery_type, sync_time in info['last_sync'].items():
+                    text_lines.append(f"- {lottery_type}: {sync_time}")
             
-            else:
-                return [types.TextContent(type="text", text=f"未知工具：{name}")]
-        
+            text = "\n".join(text_lines)
+            if info:
+                db_info_version, db_info_text = version, text
+            return [types.TextContent(type="text", text=text)]
+        except Exception as e:
+            return [types.TextContent(type="text", text=f"获取数据库信息失败：{str(e)}")]
+    
+    # 暂时屏蔽：预测接口
+    # async def handle_predict_lottery(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    #     """预测彩票号码，基于历史数据生成预测结果"""
+    #     lottery_type = arguments.get("lottery_type")
+    #     method = arguments.get("method", "rule")
+    #     count = arguments.get("count", 5)
+    #     strategy = arguments.get("strategy", "all")
+    #     
+    #     try:
+    #         # 获取历史数据用于预测
+    #         historical_data = await lottery_service.get_historical_data(lottery_type, 120)
+    #         if not historical_data:
+    #             return [types.TextContent(type="text", text=f"获取{lottery_type}历史数据失败，无法进行预测")]
+    #         
+    #         # 转换为字典格式
+    #         history_dict = [{
+    #             'period': r.period,
+    #             'numbers': r.numbers,
+    #             'special_numbers': r.special_numbers,
+    #             'draw_date': r.draw_date
+    #         } for r in historical_data]
+    #         
+    #         # 执行预测
+    #         predictions = await lottery_service.prediction_manager.predict(
+    #             lottery_type, history_dict, method=method, count=count, strategy=strategy
+    #         )
+    #         
+    #         if predictions:
+    #             text_lines = [f"{lottery_type}预测结果（方法：{method}，策略：{strategy}）：\n"]
+    #             for i, pred in enumerate(predictions, 1):
+    #                 if pred.special_numbers:
+    #                     numbers_str = f"{' '.join(pred.numbers)} + {' '.join(pred.special_numbers)}"
+    #                 else:
+    #                     numbers_str = ' '.join(pred.numbers)
+    #                 text_lines.append(f"预测 {i}: {numbers_str} (置信度: {pred.confidence:.2%})")
+    #             
+    #             return [types.TextContent(type="text", text="\n".join(text_lines))]
+    #         else:
+    #             return [types.TextContent(type="text", text=f"{lottery_type}预测失败")]
+    #             
+    #     except Exception as e:
+    #         logger.error(f"预测失败: {e}")
+    #         return [types.TextContent(type="text", text=f"预测失败：{str(e)}")]
+    
+    # 暂时屏蔽：回测接口
+    # async def handle_backtest_lottery(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    #     """回测预测算法，评估预测准确性"""
+    #     lottery_type = arguments.get("lottery_type")
+    #     window_size = arguments.get("window_size", 100)
+    #     step = arguments.get("step", 50)
+    #     
+    #     try:
+    #         # 获取历史数据用于回测
+    #         historical_data = await lottery_service.get_historical_data(lottery_type, window_size * 2)
+    #         if len(historical_data) < window_size:
+    #             return [types.TextContent(type="text", text=f"历史数据不足，需要至少{window_size}期数据")]
+    #         
+    #         # 转换为字典格式
+    #         history_dict = [{
+    #             'period': r.period,
+    #             'numbers': r.numbers,
+    #             'special_numbers': r.special_numbers,
+    #             'draw_date': r.draw_date
+    #         } for r in historical_data]
+    #         
+    #         # 执行回测
+    #         backtest_result = await lottery_service.backtest_engine.run_backtest(
+    #             lottery_type, history_dict, window_size=window_size, step=step
+    #         )
+    #         
+    #         text_lines = [
+    #             f"{lottery_type}回测结果：\n",
+    #             f"总回测期数：{backtest_result.total_periods}期",
+    #             f"平均准确率：{backtest_result.average_accuracy:.2%}",
+    #             f"最佳策略：{backtest_result.best_strategy}",
+    #             "\n各策略表现："
+    #         ]
+    #         
+    #         for strategy, performance in backtest_result.strategy_performance.items():
+    #             text_lines.append(f"- {strategy}: 准确率 {performance:.2%}")
+    #         
+    #         return [types.TextContent(type="text", text="\n".join(text_lines))]
+    #         
+    #     except Exception as e:
+    #         logger.error(f"回测失败: {e}")
+    #         return [types.TextContent(type="text", text=f"回测失败：{str(e)}")]
+    
+    # 工具名 -> 处理函数，按名称直接查表分发
+    tool_handlers = {
+        "get_latest_ssq": handle_get_latest_ssq,
+        "get_latest_3d": handle_get_latest_3d,
+        "get_latest_qlc": handle_get_latest_qlc,
+        "get_latest_kl8": handle_get_latest_kl8,
+        "get_all_latest": handle_get_all_latest,
+        "get_historical_data": handle_get_historical_data,
+        "analyze_numbers": handle_analyze_numbers,
+        "analyze_seq_numbers": handle_analyze_seq_numbers,
+        "sync_lottery_data": handle_sync_lottery_data,
+        "sync_all_lottery_data": handle_sync_all_lottery_data,
+        "force_sync_data": handle_force_sync_data,
+        "get_database_info": handle_get_database_info
+        # 暂时屏蔽：generate_random_numbers、predict_lottery、backtest_lottery
+    }
+    
+    @server.call_tool()
+    async def call_tool(name: str, arguments: Dict[str, Any]) -> List[types.TextContent]:
+        """调用工具"""
+        handler = tool_handlers.get(name)
+        if handler is None:
+            return [types.TextContent(type="text", text=f"未知工具：{name}")]
+        try:
+            return await handler(arguments)
         except Exception as e:
             logger.error(f"调用工具 {name} 失败: {e}")
             return [types.TextContent(type="text", text=f"工具调用失败：{str(e)}")]
@@ -1624,14 +1551,24 @@ def create_swlc_server() -> Server:
 
 async def async_main():
     """异步主函数"""
-    server = create_swlc_server()
+    lottery_service = SWLCService()
+    server = create_swlc_server(lottery_service)
     
-    # 通过stdio运行服务器
-    async with stdio_server() as (read_stream, write_stream):
-        await server.run(read_stream, write_stream, server.create_initialization_options())
+    # 通过stdio运行服务器，退出时关闭HTTP连接池
+    try:
+        async with stdio_server() as (read_stream, write_stream):
+            await server.run(read_stream, write_stream, server.create_initialization_options())
+    finally:
+        await lottery_service.aclose()
 
 def main():
     """同步主函数入口点"""
+    # 优先使用 uvloop 事件循环（Windows 不支持，未安装时回退到标准 asyncio）
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     asyncio.run(async_main())
 
 if __name__ == "__main__":